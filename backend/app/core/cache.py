@@ -0,0 +1,251 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+
+from .compression import CACHED_LEVELS, ENCODINGS, compress, encoded_etag, is_compressible, negotiate
+from .config import settings
+
+
+def _to_utc(value: datetime) -> datetime:
+    # MongoDB 读出的时间为不带时区的 UTC 时间
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match 使用弱比较
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+@dataclass
+class CacheEntry:
+    """缓存的响应体及其元数据（含 ETag / Last-Modified 校验器）"""
+    body: bytes
+    tags: Tuple[str, ...] = ()
+    headers: Dict[str, str] = field(default_factory=dict)
+    expires_at: float = 0.0
+    etag: str = ""
+    last_modified: Optional[datetime] = None
+    media_type: str = "application/json"
+    # 按编码缓存的压缩结果，每个内容版本只压缩一次
+    variants: Dict[str, bytes] = field(default_factory=dict, repr=False)
+    # 压缩结果增加占用时通知所属缓存
+    on_resize: Optional[Callable[[int], None]] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not self.etag:
+            self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.last_modified = _to_utc(self.last_modified or datetime.now(timezone.utc))
+        self.headers.setdefault("ETag", self.etag)
+        self.headers.setdefault("Last-Modified", format_datetime(self.last_modified, usegmt=True))
+        # 允许客户端缓存，但每次使用前都需要重新验证
+        self.headers.setdefault("Cache-Control", "no-cache")
+
+    @property
+    def size(self) -> int:
+        return (
+            len(self.body)
+            + sum(len(k) + len(v) for k, v in self.headers.items())
+            + sum(len(v) for v in self.variants.values())
+        )
+
+    def not_modified(self, request: Request) -> bool:
+        """判断条件请求是否可以直接返回 304"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return any(
+                _etag_matches(if_none_match, etag)
+                for etag in (self.etag, *(encoded_etag(self.etag, name) for name in ENCODINGS))
+            )
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since is None:
+                return False
+            return self.last_modified <= _to_utc(since)
+        return False
+
+    def encoded(self, encoding: str) -> bytes:
+        """指定编码的压缩结果（首次使用时压缩并保存）"""
+        data = self.variants.get(encoding)
+        if data is None:
+            data = self.variants[encoding] = compress(self.body, encoding, CACHED_LEVELS[encoding])
+            if self.on_resize is not None:
+                self.on_resize(len(data))
+        return data
+
+    def to_response(self, request: Request) -> Response:
+        """返回缓存的响应；文本类型按 Accept-Encoding 返回复用的压缩结果"""
+        headers = self.headers
+        encoding = None
+        if is_compressible(self.media_type):
+            headers = {**headers, "Vary": "Accept-Encoding"}
+            if len(self.body) >= settings.compression_min_bytes:
+                encoding = negotiate(request.headers.get("accept-encoding"))
+            if encoding is not None:
+                headers["ETag"] = encoded_etag(self.etag, encoding)
+                headers["Content-Encoding"] = encoding
+
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=self.encoded(encoding) if encoding else self.body,
+            media_type=self.media_type,
+            headers=headers,
+        )
+
+
+class ResponseCache:
+    """进程内响应缓存：TTL 过期 + LRU 淘汰 + 内存上限，按标签精确失效"""
+
+    def __init__(self, max_entries: int, max_bytes: int, default_ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """读取缓存，命中时移动到 LRU 队尾"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(
+        self,
+        key: str,
+        body: bytes,
+        tags: Iterable[str] = (),
+        headers: Optional[Dict[str, str]] = None,
+        ttl: Optional[float] = None,
+        last_modified: Optional[datetime] = None
+    ) -> CacheEntry:
+        """写入缓存并返回缓存条目；超过内存上限的条目不会被缓存
+
+        last_modified 缺省为生成时间，列表类响应即以缓存重建时间作为版本时间。
+        """
+        entry = CacheEntry(
+            body=body,
+            tags=tuple(tags),
+            headers=dict(headers or {}),
+            expires_at=time.monotonic() + (self.default_ttl if ttl is None else ttl),
+            last_modified=last_modified,
+        )
+        if entry.size > self.max_bytes:
+            return entry
+
+        self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        entry.on_resize = self._resized
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _resized(self, delta: int) -> None:
+        self._bytes += delta
+        self._evict()
+
+    def invalidate(self, *tags: str) -> int:
+        """使带有任一指定标签的缓存条目失效，返回失效条目数"""
+        removed = 0
+        for tag in tags:
+            for key in self._tags.pop(tag, set()):
+                if self._remove(key):
+                    removed += 1
+        self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        for entry in self._entries.values():
+            entry.on_resize = None
+        self._entries.clear()
+        self._tags.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.size
+        # 已移出的条目之后再压缩不再计入
+        entry.on_resize = None
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+
+def make_cache_key(route: str, **params: Any) -> str:
+    """由路由名和规范化后的查询参数生成缓存键"""
+    normalized = sorted((name, str(value)) for name, value in params.items() if value is not None)
+    return f"{route}?{urlencode(normalized)}" if normalized else route
+
+
+def document_timestamp(doc: Dict[str, Any]) -> Optional[datetime]:
+    """文档的最后修改时间：优先 updated_at，其次 created_at"""
+    value = doc.get("updated_at") or doc.get("created_at")
+    return value if isinstance(value, datetime) else None
+
+
+response_cache = ResponseCache(
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_bytes,
+    default_ttl=settings.cache_ttl_seconds,
+)
@@ -0,0 +1,207 @@
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # 未安装时不提供 br
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # 未安装时不提供 zstd
+    zstandard = None
+
+from .config import settings
+
+# 同等权重时的服务端偏好顺序
+ENCODINGS = tuple(
+    name for name, available in (
+        ("zstd", zstandard is not None),
+        ("br", brotli is not None),
+        ("gzip", True),
+    ) if available
+)
+
+# 每次请求都要压缩的动态响应用较快的级别；缓存条目只压缩一次，用较高的级别
+LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+CACHED_LEVELS = {"zstd": 10, "br": 9, "gzip": 9}
+
+# 值得压缩的文本类型
+COMPRESSIBLE_PREFIXES = ("text/", "application/json", "application/javascript")
+COMPRESSIBLE_SUFFIXES = ("+json", "+xml", "/xml")
+
+
+def is_compressible(media_type: str) -> bool:
+    media_type = media_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_PREFIXES) or media_type.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """按 Accept-Encoding 的 q 值选择编码，同权重时按 ENCODINGS 顺序"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.split(";")
+        name = name.strip().lower()
+        q = 1.0
+        # 只解析 q 参数，忽略其他扩展参数
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        if name:
+            weights[name] = q
+
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in ENCODINGS:
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """压缩表示的 ETag：在引号内追加编码后缀，与未压缩表示区分"""
+    if etag.endswith('"'):
+        return f"{etag[:-1]}-{encoding}\""
+    return f"{etag}-{encoding}"
+
+
+def weak_etag(etag: str) -> str:
+    """中间件压缩的响应改用弱 ETag（与未压缩表示语义等价）
+
+    客户端带着它重新验证时，处理函数（弱比较）和 StaticFiles 仍能匹配并返回 304。
+    """
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    level = LEVELS[encoding] if level is None else level
+    if encoding == "gzip":
+        # 固定 mtime，相同内容得到相同字节
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return zstandard.ZstdCompressor(level=level).compress(body)
+
+
+def stream_compressor(encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """流式压缩器：返回 (压缩一块并刷新, 结束) 两个函数"""
+    level = LEVELS[encoding]
+    if encoding == "gzip":
+        gz = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return (lambda chunk: gz.compress(chunk) + gz.flush(zlib.Z_SYNC_FLUSH)), gz.flush
+    if encoding == "br":
+        br = brotli.Compressor(quality=level)
+        return (lambda chunk: br.process(chunk) + br.flush()), br.finish
+    zs = zstandard.ZstdCompressor(level=level).compressobj()
+    return (
+        lambda chunk: zs.compress(chunk) + zs.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    ), zs.flush
+
+
+def _vary_with_accept_encoding(headers: List[Tuple[bytes, bytes]]) -> None:
+    for index, (name, value) in enumerate(headers):
+        if name == b"vary":
+            if b"accept-encoding" not in value.lower() and value.strip() != b"*":
+                headers[index] = (name, value + b", Accept-Encoding")
+            return
+    headers.append((b"vary", b"Accept-Encoding"))
+
+
+class CompressionMiddleware:
+    """响应压缩（纯 ASGI 中间件）
+
+    按 Accept-Encoding 协商 zstd / br / gzip，只压缩文本类型且不小于
+    compression_min_bytes 的响应；已带 Content-Encoding 的响应（缓存条目自行
+    压缩并复用的结果、上传文件的预压缩副本）原样通过。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        # 0 = 等待首个响应体，1 = 直接透传，2 = 流式压缩
+        state = 0
+        compressor = finish = None
+
+        async def send_wrapper(message):
+            nonlocal start, state, compressor, finish
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or state == 1:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if state == 0:
+                headers = list(start.get("headers", []))
+                names = {name for name, _ in headers}
+                media_type = next((v for n, v in headers if n == b"content-type"), b"").decode("latin-1")
+                if (
+                    start["status"] in (204, 206, 304)
+                    or b"content-encoding" in names
+                    or not is_compressible(media_type)
+                    or (not more_body and len(body) < settings.compression_min_bytes)
+                ):
+                    state = 1
+                    if is_compressible(media_type) and start["status"] not in (204, 206, 304):
+                        _vary_with_accept_encoding(headers)
+                        start = {**start, "headers": headers}
+                    await send(start)
+                    await send(message)
+                    return
+
+                headers = [
+                    (name, value) for name, value in headers
+                    if name not in (b"content-length", b"etag", b"accept-ranges")
+                ]
+                for name, value in start.get("headers", []):
+                    if name == b"etag":
+                        etag = weak_etag(value.decode("latin-1"))
+                        headers.append((b"etag", etag.encode("latin-1")))
+                headers.append((b"content-encoding", encoding.encode()))
+                _vary_with_accept_encoding(headers)
+
+                if not more_body:
+                    compressed = compress(body, encoding)
+                    headers.append((b"content-length", str(len(compressed)).encode()))
+                    state = 1
+                    await send({**start, "headers": headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                state = 2
+                compressor, finish = stream_compressor(encoding)
+                await send({**start, "headers": headers})
+
+            chunk = compressor(body) if body else b""
+            if not more_body:
+                chunk += finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -7,17 +7,101 @@ class Settings(BaseSettings):
     
     # MongoDB配置
     mongodb_uri: str = "mongodb://localhost:27017/snc-blog"
+    # 启动时按注册表创建缺失索引；explain 检查路由查询是否命中索引
+    mongo_ensure_indexes: bool = True
+    mongo_explain_check: bool = False
+    
+    # MongoDB 连接池配置（未设置的超时沿用驱动默认值）
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 4
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_server_selection_timeout_ms: int = 5000
+    mongo_connect_timeout_ms: int = 5000
+    mongo_socket_timeout_ms: Optional[int] = None
+    mongo_compressors: str = ""  # 例如 "zstd,snappy,zlib"
+    mongo_read_preference: str = "primary"
     
     # JWT配置
     jwt_secret: str
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 10080  # 7天
     
+    # 已验证令牌缓存
+    token_cache_max_entries: int = 1024
+    token_cache_ttl_seconds: float = 300
+    # 撤销记录在 worker 间同步（change stream，不支持时按间隔轮询）
+    token_revocation_watch: bool = True
+    token_revocation_poll_interval_seconds: float = 5
+    
+    # 密码哈希线程池（bcrypt 并发上限与排队上限）
+    password_hash_workers: int = 2
+    password_hash_max_queue: int = 32
+    
     # CORS配置
     client_url: str = "http://localhost:3000"
     
+    # 站点信息（RSS / sitemap 中的链接，未设置时使用 client_url）
+    site_url: str = ""
+    site_title: str = "SNC Blog"
+    
     # 服务器配置
     port: int = 5000
+    # 生产环境（gunicorn）worker 数；0 表示按 CPU 数启动
+    workers: int = 0
+    keepalive_seconds: int = 5
+    backlog: int = 2048
+    max_requests: int = 10000
+    max_requests_jitter: int = 1000
+    graceful_timeout_seconds: int = 30
+    # 信任其 X-Forwarded-* 头的反向代理地址（逗号分隔，"*" 表示全部）
+    forwarded_allow_ips: str = "127.0.0.1"
+    
+    # 响应缓存配置
+    cache_ttl_seconds: float = 300
+    cache_max_entries: int = 1024
+    cache_max_bytes: int = 64 * 1024 * 1024
+    # 小于该大小的响应不压缩
+    compression_min_bytes: int = 1024
+    
+    # 管理仪表盘统计的缓存时间
+    admin_stats_ttl_seconds: float = 30
+    
+    # 上传配置
+    upload_dir: str = "uploads"
+    upload_max_bytes: int = 20 * 1024 * 1024
+    image_workers: int = 2
+    # 设置后由 nginx 发送上传文件（X-Accel-Redirect 内部路径前缀，例如 "/_uploads/"）
+    upload_accel_redirect: str = ""
+    
+    # 浏览计数批量写入间隔与热度半衰期
+    view_flush_interval_seconds: float = 10
+    hot_half_life_hours: float = 72
+    
+    # 活动状态调度：未填写结束时间的活动按默认时长结束；无待处理边界时的最长休眠
+    event_default_duration_hours: float = 2
+    event_schedule_max_sleep_seconds: float = 3600
+    
+    # 相关文章 TF-IDF 词表上限
+    related_max_terms: int = 2048
+    
+    # 设置热更新：多 worker 部署时通过 change stream 同步其他进程的修改，
+    # 单节点 mongod 不支持时按该间隔轮询
+    site_settings_watch: bool = True
+    site_settings_poll_interval_seconds: float = 5
+    
+    # 内容同步：每个 worker 的搜索索引、分类统计、相关文章、订阅和响应缓存
+    # 通过 content_changes 集合感知其他 worker 的修改（不支持 change stream 时轮询）
+    content_sync_watch: bool = True
+    content_sync_poll_interval_seconds: float = 2
+    
+    # /api/metrics 与 /api/health/details 的访问控制：允许的客户端地址或网段
+    # （逗号分隔，"*" 表示全部），设置 monitoring_token 后携带该 Bearer 令牌也可访问
+    monitoring_allow_ips: str = "127.0.0.1"
+    monitoring_token: str = ""
+    
+    # 慢请求 / 慢查询日志阈值（毫秒）
+    slow_request_ms: float = 500
+    slow_query_ms: float = 100
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,161 @@
+import asyncio
+import math
+import re
+from typing import Any, Dict, List, Optional
+
+from markdown_it import MarkdownIt
+from pymongo import UpdateOne
+
+# 渲染规则或派生字段算法变化时递增，启动时会在后台重新渲染旧版本的文章
+RENDER_VERSION = 1
+
+# 阅读速度：中文按字、其他语言按词
+CJK_CHARS_PER_MINUTE = 400
+WORDS_PER_MINUTE = 200
+
+EXCERPT_LENGTH = 150
+
+# 后台重建每批处理的文章数
+REBUILD_BATCH_SIZE = 50
+
+# 与前端 marked 的 breaks/gfm 配置保持一致；禁用原始 HTML，危险链接协议由 markdown-it 过滤
+_md = MarkdownIt("commonmark", {"html": False, "breaks": True}).enable(["table", "strikethrough"])
+
+_CJK_RANGES = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_CJK = re.compile(rf"[{_CJK_RANGES}]")
+_WORD = re.compile(r"[A-Za-z0-9]+(?:['\u2019-][A-Za-z0-9]+)*")
+_SLUG_STRIP = re.compile(r"[^\w\s-]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _slugify(text: str, used: Dict[str, int]) -> str:
+    slug = _WHITESPACE.sub("-", _SLUG_STRIP.sub("", text).strip().lower()) or "section"
+    count = used.get(slug, 0)
+    used[slug] = count + 1
+    return slug if count == 0 else f"{slug}-{count}"
+
+
+def _plain_text(inline) -> str:
+    return "".join(
+        child.content for child in (inline.children or [])
+        if child.type in ("text", "code_inline")
+    )
+
+
+def count_words(text: str) -> int:
+    """中日韩字符逐字计数，其余按单词计数"""
+    return len(_CJK.findall(text)) + len(_WORD.findall(text))
+
+
+def estimate_read_time(text: str) -> str:
+    minutes = len(_CJK.findall(text)) / CJK_CHARS_PER_MINUTE + len(_WORD.findall(text)) / WORDS_PER_MINUTE
+    return f"{max(1, math.ceil(minutes))} 分钟"
+
+
+def make_excerpt(text: str) -> str:
+    text = _WHITESPACE.sub(" ", text).strip()
+    if len(text) <= EXCERPT_LENGTH:
+        return text
+    return text[:EXCERPT_LENGTH].rstrip() + "…"
+
+
+def render_content(content: str) -> Dict[str, Any]:
+    """渲染 Markdown 并计算派生字段
+
+    返回 content_html、toc（标题层级/文本/锚点）、word_count、
+    自动阅读时长 read_time 和首段摘要 excerpt。代码块不计入字数。
+    """
+    tokens = _md.parse(content or "")
+    toc: List[Dict[str, Any]] = []
+    used_slugs: Dict[str, int] = {}
+    texts: List[str] = []
+    first_paragraph = ""
+
+    for index, token in enumerate(tokens):
+        if token.type != "inline":
+            continue
+        text = _plain_text(token)
+        texts.append(text)
+        opener = tokens[index - 1]
+        if opener.type == "heading_open":
+            anchor = _slugify(text, used_slugs)
+            opener.attrSet("id", anchor)
+            toc.append({"level": int(opener.tag[1]), "text": text, "id": anchor})
+        elif opener.type == "paragraph_open" and not first_paragraph and text.strip():
+            first_paragraph = text
+
+    plain = "\n".join(texts)
+    return {
+        "content_html": _md.renderer.render(tokens, _md.options, {}),
+        "toc": toc,
+        "word_count": count_words(plain),
+        "read_time": estimate_read_time(plain),
+        "excerpt": make_excerpt(first_paragraph or plain),
+        "render_version": RENDER_VERSION,
+    }
+
+
+def content_fields(
+    content: str,
+    excerpt: Optional[str] = None,
+    read_time: Optional[str] = None
+) -> Dict[str, Any]:
+    """写入文章时需要保存的渲染结果
+
+    excerpt 为空字符串时使用首段自动摘要，为 None 时不改动已有摘要；
+    未指定 read_time 时按字数估算，并通过 read_time_manual 记录，
+    后台重建时不会覆盖手工填写的阅读时长。
+    """
+    fields = render_content(content)
+    if excerpt is None:
+        del fields["excerpt"]
+    elif excerpt.strip():
+        fields["excerpt"] = excerpt
+    fields["read_time_manual"] = read_time is not None
+    if read_time is not None:
+        fields["read_time"] = read_time
+    return fields
+
+
+def _rerender(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return content_fields(
+        doc.get("content", ""),
+        excerpt=doc.get("excerpt", ""),
+        read_time=doc.get("read_time") if doc.get("read_time_manual") else None
+    )
+
+
+async def rebuild_stale_content(db) -> List[Any]:
+    """重新渲染 render_version 落后的文章，返回处理过的文章 _id
+
+    渲染在线程池中分批进行，避免长时间占用事件循环。摘要等派生字段可能随之改变，
+    调用方据此刷新依赖它们的内存索引。
+    """
+    loop = asyncio.get_running_loop()
+    cursor = db.blogs.find(
+        {"render_version": {"$ne": RENDER_VERSION}},
+        {"content": 1, "excerpt": 1, "read_time": 1, "read_time_manual": 1}
+    )
+    done: List[Any] = []
+    batch: List[Dict[str, Any]] = []
+
+    async def flush():
+        rendered = await loop.run_in_executor(None, lambda: [_rerender(doc) for doc in batch])
+        await db.blogs.bulk_write(
+            # 期间被编辑过的文章已是最新版本，条件不再匹配，不会被旧内容覆盖
+            [
+                UpdateOne({"_id": doc["_id"], "render_version": {"$ne": RENDER_VERSION}}, {"$set": fields})
+                for doc, fields in zip(batch, rendered)
+            ],
+            ordered=False
+        )
+        done.extend(doc["_id"] for doc in batch)
+        batch.clear()
+
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return done
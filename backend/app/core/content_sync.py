@@ -0,0 +1,170 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import OperationFailure, PyMongoError
+
+from .cache import response_cache
+from .config import settings
+from .event_schedule import event_scheduler, utc_now
+from .feeds import SITEMAP, feed_store
+from .related import PROJECTION as RELATED_PROJECTION, related_index
+from .search import INDEX_PROJECTION, search_index
+from .settings_store import CHANGE_STREAM_UNSUPPORTED, WATCH_RETRY_SECONDS
+from .taxonomy import taxonomy
+
+# 变更通知集合（TTL 索引清理过期记录）
+CHANGES = "content_changes"
+
+BLOGS = "blogs"
+EVENTS = "events"
+SERVICES = "services"
+VIEWS = "views"
+
+# 重新同步一篇文章时读取的字段（搜索索引、分类统计、相关文章共用）
+BLOG_PROJECTION = INDEX_PROJECTION | RELATED_PROJECTION
+
+# 轮询时回看的时间窗口，容忍各进程写入时间的先后差异
+POLL_LOOKBACK = timedelta(seconds=30)
+
+
+class ContentSync:
+    """进程内内容快照的跨 worker 同步
+
+    修改接口在写库并更新本进程的索引和缓存后发布一条变更通知；每个 worker
+    通过 change stream 跟踪通知集合，对其他进程发布的变更重新读取文档并刷新
+    搜索索引、分类统计、相关文章、订阅缓存和响应缓存。单节点 mongod 不支持
+    change stream 时退化为定期轮询。
+    """
+
+    def __init__(self):
+        # preload_app 时各 worker 从同一个主进程 fork，来源标识需带上进程号
+        self._token = uuid.uuid4().hex[:12]
+        self._seen: Dict[Any, datetime] = {}
+        self.mode = "static"
+        self.published = 0
+        self.applied = 0
+
+    @property
+    def origin(self) -> str:
+        return f"{self._token}:{os.getpid()}"
+
+    async def publish(self, db, kind: str, doc_id: Optional[str] = None) -> None:
+        """发布一条变更通知；doc_id 为空表示该类内容需要整体刷新"""
+        try:
+            await db[CHANGES].insert_one({
+                "kind": kind,
+                "doc_id": doc_id,
+                "origin": self.origin,
+                "at": utc_now(),
+            })
+        except PyMongoError as e:
+            # 本进程的修改已经生效，通知失败只影响其他 worker
+            print(f"⚠️  变更通知写入失败：{e}")
+            return
+        self.published += 1
+
+    async def watch(self, db, since: datetime) -> None:
+        """持续同步其他进程的内容修改（作为后台任务运行）
+
+        since 为本进程构建快照之前的时间，建立监听后补上这之后的通知。
+        """
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                self.mode = "change_stream"
+                async with db[CHANGES].watch(pipeline) as stream:
+                    since = await self._catch_up(db, since)
+                    async for change in stream:
+                        await self._receive(db, change["fullDocument"])
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED or "replica set" in str(e):
+                    print("ℹ️  MongoDB 不支持 change stream，内容变更改为定期轮询")
+                    await self.poll(db, since)
+                    return
+                print(f"⚠️  内容变更 change stream 中断：{e}")
+            except PyMongoError as e:
+                print(f"⚠️  内容变更 change stream 中断：{e}")
+            await asyncio.sleep(WATCH_RETRY_SECONDS)
+
+    async def poll(self, db, since: datetime) -> None:
+        self.mode = "polling"
+        while True:
+            await asyncio.sleep(settings.content_sync_poll_interval_seconds)
+            try:
+                since = await self._catch_up(db, since)
+            except PyMongoError as e:
+                print(f"⚠️  内容变更轮询失败：{e}")
+
+    async def _catch_up(self, db, since: datetime) -> datetime:
+        """处理 since 之后的通知（含回看窗口），返回下一次查询的起点"""
+        changes = await db[CHANGES].find(
+            {"at": {"$gte": since - POLL_LOOKBACK}}
+        ).sort("at", 1).to_list(None)
+        for change in changes:
+            await self._receive(db, change)
+            since = max(since, change["at"])
+        # 已处理记录只需保留回看窗口内的
+        horizon = since - POLL_LOOKBACK
+        self._seen = {key: at for key, at in self._seen.items() if at >= horizon}
+        return since
+
+    async def _receive(self, db, change: Dict[str, Any]) -> None:
+        if change["_id"] in self._seen:
+            return
+        self._seen[change["_id"]] = change["at"]
+        if change.get("origin") == self.origin:
+            return
+        try:
+            await self.apply(db, change["kind"], change.get("doc_id"))
+        except PyMongoError as e:
+            print(f"⚠️  内容变更同步失败（{change['kind']} {change.get('doc_id')}）：{e}")
+            return
+        self.applied += 1
+
+    async def apply(self, db, kind: str, doc_id: Optional[str]) -> None:
+        """按数据库中的最新内容刷新本进程的快照和缓存"""
+        if kind == BLOGS:
+            await self._apply_blog(db, doc_id)
+        elif kind == EVENTS:
+            response_cache.invalidate("events:list", *([f"events:{doc_id}"] if doc_id else []))
+            feed_store.mark_dirty(SITEMAP)
+            event_scheduler.wake()
+        elif kind == SERVICES:
+            response_cache.invalidate("services:list")
+        elif kind == VIEWS:
+            response_cache.invalidate("blogs:popular")
+
+    async def _apply_blog(self, db, doc_id: Optional[str]) -> None:
+        if doc_id is None:
+            # 整体刷新（例如另一个 worker 重新渲染了旧文章）
+            await search_index.rebuild(db)
+            await taxonomy.rebuild(db)
+            await related_index.rebuild(db)
+            feed_store.mark_dirty()
+            response_cache.clear()
+            return
+        try:
+            doc = await db.blogs.find_one({"_id": ObjectId(doc_id)}, BLOG_PROJECTION)
+        except InvalidId:
+            return
+        if doc is None:
+            search_index.remove(doc_id)
+            taxonomy.remove(doc_id)
+            await related_index.remove(doc_id)
+        else:
+            search_index.upsert(doc)
+            taxonomy.upsert(doc)
+            await related_index.upsert(doc)
+        feed_store.mark_dirty()
+        response_cache.invalidate("blogs:list", "blogs:popular", "blogs:related", f"blogs:{doc_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "published": self.published, "applied": self.applied}
+
+
+content_sync = ContentSync()
@@ -1,5 +1,12 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from .config import settings
+from .metrics import command_listener
 
 # MongoDB客户端
 client: AsyncIOMotorClient = None
@@ -8,12 +15,125 @@ client: AsyncIOMotorClient = None
 db = None
 
 
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """连接池监听器：统计连接数、借出数和等待队列"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wait_started: Dict[int, float] = {}
+        self.opened = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.cleared = 0
+
+    def _end_wait(self) -> None:
+        started = self._wait_started.pop(threading.get_ident(), None)
+        self.waiting = max(0, self.waiting - 1)
+        if started is not None:
+            wait = time.monotonic() - started
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.opened += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._wait_started[threading.get_ident()] = time.monotonic()
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._end_wait()
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self._end_wait()
+            self.checked_out += 1
+            self.checkouts += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_pool_size": settings.mongo_max_pool_size,
+                "open": self.opened - self.closed,
+                "in_use": self.checked_out,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "cleared": self.cleared,
+            }
+
+
+pool_stats = PoolStatsListener()
+
+
+def _client_options() -> Dict[str, Any]:
+    """由配置生成 MongoDB 客户端参数，未设置的项沿用驱动默认值"""
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "socketTimeoutMS": settings.mongo_socket_timeout_ms,
+        "readPreference": settings.mongo_read_preference,
+        "event_listeners": [pool_stats, command_listener],
+    }
+    if settings.mongo_compressors:
+        options["compressors"] = settings.mongo_compressors
+    return {name: value for name, value in options.items() if value is not None}
+
+
+async def warm_up_pool():
+    """预先建立连接并 ping，避免部署后的首批请求承担建连开销"""
+    connections = max(1, settings.mongo_min_pool_size)
+    await asyncio.gather(*(db.command("ping") for _ in range(connections)))
+
+
 async def connect_to_mongo():
     """连接到MongoDB"""
     global client, db
-    client = AsyncIOMotorClient(settings.mongodb_uri)
+    client = AsyncIOMotorClient(settings.mongodb_uri, **_client_options())
     db = client.get_default_database()
-    print("✅ MongoDB 连接成功")
+    await warm_up_pool()
+    print(f"✅ MongoDB 连接成功（连接池已预热 {pool_stats.stats()['open']} 个连接）")
 
 
 async def close_mongo_connection():
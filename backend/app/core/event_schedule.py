@@ -0,0 +1,157 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import PyMongoError
+
+from .cache import response_cache
+from .config import settings
+
+UPCOMING = "upcoming"
+ONGOING = "ongoing"
+PAST = "past"
+
+# 由调度器维护的状态；其他取值（如 cancelled）保持不变
+MANAGED_STATUSES = (UPCOMING, ONGOING, PAST)
+
+
+def utc_now() -> datetime:
+    """与 MongoDB 读出的时间一致：不带时区的 UTC 时间"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def default_duration() -> timedelta:
+    """未填写 end_date 的活动按该时长结束"""
+    return timedelta(hours=settings.event_default_duration_hours)
+
+
+def status_for(date: datetime, end_date: Optional[datetime], now: datetime) -> str:
+    date = _naive_utc(date)
+    end = _naive_utc(end_date) if end_date else date + default_duration()
+    if now < date:
+        return UPCOMING
+    if now < end:
+        return ONGOING
+    return PAST
+
+
+def _transition_filters(now: datetime) -> Dict[str, Dict[str, Any]]:
+    """每个目标状态对应的 update_many 条件（只匹配状态确实需要改变的活动）"""
+    started_before = now - default_duration()
+    ended = {"$or": [
+        {"end_date": {"$lte": now}},
+        {"end_date": None, "date": {"$lte": started_before}},
+    ]}
+    running = {"$or": [
+        {"end_date": {"$gt": now}},
+        {"end_date": None, "date": {"$gt": started_before}},
+    ]}
+    return {
+        UPCOMING: {"status": {"$in": [ONGOING, PAST]}, "date": {"$gt": now}},
+        ONGOING: {"status": {"$in": [UPCOMING, PAST]}, "date": {"$lte": now}, **running},
+        PAST: {"status": {"$in": [UPCOMING, ONGOING]}, **ended},
+    }
+
+
+class EventScheduler:
+    """活动状态调度器（upcoming → ongoing → past）
+
+    每次运行用三条 update_many 批量修正状态，然后休眠到下一个活动开始或结束的时刻；
+    活动被创建或修改时通过 wake() 立即重新计算。多 worker 部署时每个 worker 各自运行，
+    更新是幂等的；到达边界的活动无论由哪个 worker 更新，各 worker 都会使自己的缓存失效。
+    """
+
+    def __init__(self):
+        self._wake = asyncio.Event()
+        self.last_run: Optional[datetime] = None
+        self.runs = 0
+        self.transitions = 0
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    async def _boundary_ids(self, db, since: datetime, now: datetime) -> List[Any]:
+        """自上次运行以来开始或结束的活动"""
+        duration = default_duration()
+        return [doc["_id"] async for doc in db.events.find({"$or": [
+            {"date": {"$gt": since, "$lte": now}},
+            {"end_date": {"$gt": since, "$lte": now}},
+            {"end_date": None, "date": {"$gt": since - duration, "$lte": now - duration}},
+        ]}, {"_id": 1})]
+
+    async def apply(self, db, now: Optional[datetime] = None) -> int:
+        """批量修正活动状态，返回修改的活动数"""
+        now = now or utc_now()
+        changed = await self._boundary_ids(db, self.last_run, now) if self.last_run else []
+
+        modified = 0
+        for status, query in _transition_filters(now).items():
+            result = await db.events.update_many(query, {"$set": {"status": status}})
+            modified += result.modified_count
+
+        self.last_run = now
+        self.runs += 1
+        self.transitions += modified
+        if modified or changed:
+            response_cache.invalidate("events:list", *(f"events:{event_id}" for event_id in changed))
+        return modified
+
+    async def next_transition(self, db, now: datetime) -> Optional[datetime]:
+        """下一个活动开始或结束的时刻"""
+        managed = {"status": {"$in": list(MANAGED_STATUSES)}}
+        duration = default_duration()
+        candidates = []
+
+        starting = await db.events.find_one(
+            {**managed, "date": {"$gt": now}}, {"date": 1}, sort=[("date", 1)]
+        )
+        if starting:
+            candidates.append(starting["date"])
+        ending = await db.events.find_one(
+            {**managed, "end_date": {"$gt": now}}, {"end_date": 1}, sort=[("end_date", 1)]
+        )
+        if ending:
+            candidates.append(ending["end_date"])
+        default_ending = await db.events.find_one(
+            {**managed, "end_date": None, "date": {"$gt": now - duration}},
+            {"date": 1}, sort=[("date", 1)]
+        )
+        if default_ending:
+            candidates.append(default_ending["date"] + duration)
+
+        return min((c for c in candidates if c > now), default=None)
+
+    async def run(self, db) -> None:
+        """后台任务：运行到被取消为止"""
+        while True:
+            self._wake.clear()
+            delay = settings.event_schedule_max_sleep_seconds
+            try:
+                now = utc_now()
+                modified = await self.apply(db, now)
+                if modified:
+                    print(f"📅 已更新 {modified} 个活动的状态")
+                upcoming = await self.next_transition(db, now)
+                if upcoming is not None:
+                    # 稍晚于边界唤醒，避免时钟误差导致提前运行
+                    delay = min(delay, (upcoming - utc_now()).total_seconds() + 1)
+            except PyMongoError as e:
+                print(f"⚠️  活动状态更新失败：{e}")
+                delay = min(delay, 60)
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(delay, 1))
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"runs": self.runs, "transitions": self.transitions}
+
+
+event_scheduler = EventScheduler()
@@ -0,0 +1,277 @@
+import asyncio
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from xml.sax.saxutils import escape, quoteattr
+
+from .cache import CacheEntry
+from .config import settings
+
+# RSS / Atom 中的文章数
+FEED_ITEMS = 20
+
+# 单个 sitemap 文件的 URL 上限（协议规定 50,000）
+SITEMAP_MAX_URLS = 50000
+
+# 前端静态页面（路径, 更新频率）
+STATIC_PAGES = [
+    ("/", "daily"),
+    ("/blog", "daily"),
+    ("/events", "weekly"),
+    ("/services", "monthly"),
+    ("/about", "monthly"),
+]
+
+FEED_PROJECTION = {
+    "title": 1, "excerpt": 1, "content_html": 1, "author": 1,
+    "category": 1, "tags": 1, "date": 1, "updated_at": 1,
+}
+
+RSS = "rss"
+ATOM = "atom"
+SITEMAP = "sitemap"
+
+MEDIA_TYPES = {
+    RSS: "application/rss+xml; charset=utf-8",
+    ATOM: "application/atom+xml; charset=utf-8",
+    SITEMAP: "application/xml; charset=utf-8",
+}
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+
+def site_url() -> str:
+    return (settings.site_url or settings.client_url).rstrip("/")
+
+
+def _utc(value: Optional[datetime]) -> datetime:
+    if not isinstance(value, datetime):
+        return datetime.now(timezone.utc)
+    # MongoDB 读出的时间为不带时区的 UTC 时间
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _rfc3339(value: Optional[datetime]) -> str:
+    return _utc(value).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _post_url(doc: Dict[str, Any]) -> str:
+    return f"{site_url()}/blog/{doc['_id']}"
+
+
+def _updated(doc: Dict[str, Any]) -> Optional[datetime]:
+    return doc.get("updated_at") or doc.get("date")
+
+
+def render_rss(posts: List[Dict[str, Any]]) -> bytes:
+    base = site_url()
+    parts = [
+        XML_HEADER,
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" '
+        'xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/">\n<channel>\n',
+        f"<title>{escape(settings.site_title)}</title>\n",
+        f"<link>{escape(base)}/blog</link>\n",
+        f"<description>{escape(settings.site_title)}</description>\n",
+        f'<atom:link href={quoteattr(base + "/feed.xml")} rel="self" type="application/rss+xml"/>\n',
+    ]
+    if posts:
+        parts.append(f"<lastBuildDate>{format_datetime(_utc(_updated(posts[0])), usegmt=True)}</lastBuildDate>\n")
+    for post in posts:
+        url = _post_url(post)
+        parts.append("<item>\n")
+        parts.append(f"<title>{escape(post.get('title', ''))}</title>\n")
+        parts.append(f"<link>{escape(url)}</link>\n")
+        parts.append(f'<guid isPermaLink="true">{escape(url)}</guid>\n')
+        parts.append(f"<pubDate>{format_datetime(_utc(post.get('date')), usegmt=True)}</pubDate>\n")
+        if post.get("author"):
+            parts.append(f"<dc:creator>{escape(post['author'])}</dc:creator>\n")
+        for category in [post.get("category")] + list(post.get("tags") or []):
+            if category:
+                parts.append(f"<category>{escape(category)}</category>\n")
+        parts.append(f"<description>{escape(post.get('excerpt', ''))}</description>\n")
+        if post.get("content_html"):
+            parts.append(f"<content:encoded>{escape(post['content_html'])}</content:encoded>\n")
+        parts.append("</item>\n")
+    parts.append("</channel>\n</rss>\n")
+    return "".join(parts).encode()
+
+
+def render_atom(posts: List[Dict[str, Any]]) -> bytes:
+    base = site_url()
+    updated = _rfc3339(_updated(posts[0]) if posts else None)
+    parts = [
+        XML_HEADER,
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n',
+        f"<title>{escape(settings.site_title)}</title>\n",
+        f"<id>{escape(base)}/</id>\n",
+        f'<link href={quoteattr(base + "/blog")}/>\n',
+        f'<link href={quoteattr(base + "/atom.xml")} rel="self" type="application/atom+xml"/>\n',
+        f"<updated>{updated}</updated>\n",
+    ]
+    for post in posts:
+        url = _post_url(post)
+        parts.append("<entry>\n")
+        parts.append(f"<title>{escape(post.get('title', ''))}</title>\n")
+        parts.append(f"<id>{escape(url)}</id>\n")
+        parts.append(f"<link href={quoteattr(url)}/>\n")
+        parts.append(f"<published>{_rfc3339(post.get('date'))}</published>\n")
+        parts.append(f"<updated>{_rfc3339(_updated(post))}</updated>\n")
+        parts.append(f"<author><name>{escape(post.get('author') or settings.site_title)}</name></author>\n")
+        for category in [post.get("category")] + list(post.get("tags") or []):
+            if category:
+                parts.append(f"<category term={quoteattr(category)}/>\n")
+        parts.append(f"<summary>{escape(post.get('excerpt', ''))}</summary>\n")
+        if post.get("content_html"):
+            parts.append(f'<content type="html">{escape(post["content_html"])}</content>\n')
+        parts.append("</entry>\n")
+    parts.append("</feed>\n")
+    return "".join(parts).encode()
+
+
+def _url_element(loc: str, lastmod: Optional[datetime] = None, changefreq: Optional[str] = None) -> str:
+    element = f"<url><loc>{escape(loc)}</loc>"
+    if lastmod is not None:
+        element += f"<lastmod>{_rfc3339(lastmod)}</lastmod>"
+    if changefreq:
+        element += f"<changefreq>{changefreq}</changefreq>"
+    return element + "</url>\n"
+
+
+URLSET_OPEN = '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = "</urlset>\n"
+
+
+class FeedStore:
+    """RSS、Atom 与 sitemap 的预生成结果
+
+    结果以字节和 ETag 保存在内存中；文章或活动变更时只标记为脏，
+    下一次请求时重新生成一次，连续多次修改只触发一次生成。
+    已发布文章超过 SITEMAP_MAX_URLS 时 /sitemap.xml 变为 sitemap 索引，
+    各分片按 _id 边界流式输出。
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, CacheEntry] = {}
+        self.dirty: Set[str] = {RSS, ATOM, SITEMAP}
+        # 分片 sitemap 的 _id 下界（为空表示未分片）
+        self.sitemap_bounds: List[Any] = []
+        self.generations = 0
+        self._lock = asyncio.Lock()
+
+    def mark_dirty(self, *names: str) -> None:
+        self.dirty.update(names or (RSS, ATOM, SITEMAP))
+
+    async def get(self, name: str, db) -> CacheEntry:
+        if name in self.dirty or name not in self.entries:
+            async with self._lock:
+                if name in self.dirty or name not in self.entries:
+                    # 先清除标记：生成期间发生的修改会重新标记
+                    self.dirty.discard(name)
+                    try:
+                        body, last_modified = await self._generate(name, db)
+                    except BaseException:
+                        self.dirty.add(name)
+                        raise
+                    self.entries[name] = CacheEntry(
+                        body=body, media_type=MEDIA_TYPES[name], last_modified=last_modified
+                    )
+                    self.generations += 1
+        return self.entries[name]
+
+    async def _generate(self, name: str, db):
+        if name == SITEMAP:
+            return await self._generate_sitemap(db)
+        posts = await db.blogs.find({"published": True}, FEED_PROJECTION).sort(
+            [("date", -1), ("_id", -1)]
+        ).limit(FEED_ITEMS).to_list(FEED_ITEMS)
+        last_modified = max((_utc(_updated(post)) for post in posts), default=None)
+        body = render_rss(posts) if name == RSS else render_atom(posts)
+        return body, last_modified
+
+    async def _latest_event_update(self, db) -> Optional[datetime]:
+        """最近一次修改活动的时间；早期没有 updated_at 的活动按 created_at 计"""
+        updated = await db.events.find_one(
+            {"published": True, "updated_at": {"$ne": None}},
+            {"updated_at": 1}, sort=[("updated_at", -1)]
+        )
+        created = await db.events.find_one(
+            {"published": True, "updated_at": None},
+            {"created_at": 1}, sort=[("created_at", -1)]
+        )
+        stamps = [
+            stamp for stamp in (
+                updated and updated.get("updated_at"), created and created.get("created_at")
+            ) if isinstance(stamp, datetime)
+        ]
+        return max(stamps, default=None)
+
+    async def _generate_sitemap(self, db):
+        count = await db.blogs.count_documents({"published": True})
+        events_updated = await self._latest_event_update(db)
+        base = site_url()
+        now = datetime.now(timezone.utc)
+
+        if count + len(STATIC_PAGES) <= SITEMAP_MAX_URLS:
+            self.sitemap_bounds = []
+            parts = [XML_HEADER, URLSET_OPEN]
+            for path, changefreq in STATIC_PAGES:
+                lastmod = events_updated if path == "/events" else None
+                parts.append(_url_element(base + path, lastmod, changefreq))
+            async for post in db.blogs.find(
+                {"published": True}, {"updated_at": 1, "date": 1}
+            ).sort("_id", 1):
+                parts.append(_url_element(_post_url(post), _updated(post)))
+            parts.append(URLSET_CLOSE)
+            return "".join(parts).encode(), now
+
+        # 分片：记录每个分片第一篇文章的 _id
+        bounds = []
+        position = 0
+        async for post in db.blogs.find({"published": True}, {"_id": 1}).sort("_id", 1):
+            if position % SITEMAP_MAX_URLS == 0:
+                bounds.append(post["_id"])
+            position += 1
+        self.sitemap_bounds = bounds
+
+        parts = [XML_HEADER, '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+        # 分片 0 为静态页面
+        for index in range(len(bounds) + 1):
+            parts.append(
+                f"<sitemap><loc>{escape(base)}/sitemap-{index}.xml</loc>"
+                f"<lastmod>{_rfc3339(now)}</lastmod></sitemap>\n"
+            )
+        parts.append("</sitemapindex>\n")
+        return "".join(parts).encode(), now
+
+    def has_sitemap_part(self, index: int) -> bool:
+        """仅在分片模式下存在 /sitemap-{index}.xml"""
+        return bool(self.sitemap_bounds) and 0 <= index <= len(self.sitemap_bounds)
+
+    async def stream_sitemap_part(self, index: int, db) -> AsyncIterator[bytes]:
+        """流式输出一个 sitemap 分片（0 为静态页面，其余按 _id 区间）"""
+        base = site_url()
+        yield (XML_HEADER + URLSET_OPEN).encode()
+        if index == 0:
+            events_updated = await self._latest_event_update(db)
+            for path, changefreq in STATIC_PAGES:
+                lastmod = events_updated if path == "/events" else None
+                yield _url_element(base + path, lastmod, changefreq).encode()
+        else:
+            query: Dict[str, Any] = {"published": True, "_id": {"$gte": self.sitemap_bounds[index - 1]}}
+            if index < len(self.sitemap_bounds):
+                query["_id"]["$lt"] = self.sitemap_bounds[index]
+            chunk: List[str] = []
+            async for post in db.blogs.find(query, {"updated_at": 1, "date": 1}).sort("_id", 1):
+                chunk.append(_url_element(_post_url(post), _updated(post)))
+                if len(chunk) >= 1000:
+                    yield "".join(chunk).encode()
+                    chunk = []
+            if chunk:
+                yield "".join(chunk).encode()
+        yield URLSET_CLOSE.encode()
+
+
+feed_store = FeedStore()
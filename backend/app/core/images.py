@@ -0,0 +1,78 @@
+"""图片派生图生成
+
+在独立进程中运行（见 uploads.py 的进程池），因此只依赖标准库和 Pillow。
+"""
+import os
+from typing import Any, Dict, Iterable, List
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow 未安装时只保存原图，不生成派生图
+    Image = None
+
+# 缩略图边长（正方形裁剪）
+THUMBNAIL_SIZE = 320
+
+# 各格式的编码参数
+ENCODE_OPTIONS = {
+    "webp": {"quality": 80, "method": 4},
+    "avif": {"quality": 60},
+}
+
+
+def available() -> bool:
+    return Image is not None
+
+
+def output_formats() -> List[str]:
+    """当前 Pillow 支持编码的派生格式"""
+    if Image is None:
+        return []
+    return [fmt for fmt in ENCODE_OPTIONS if features.check(fmt)]
+
+
+def _save(image, directory: str, name: str, fmt: str) -> None:
+    path = os.path.join(directory, name)
+    # 同一内容的派生图文件名相同，已存在即可复用
+    if os.path.exists(path):
+        return
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    image.save(tmp_path, fmt.upper(), **ENCODE_OPTIONS[fmt])
+    os.replace(tmp_path, path)
+
+
+def render_variants(source: str, directory: str, stem: str, widths: Iterable[int]) -> Dict[str, Any]:
+    """为原图生成各宽度的 WebP/AVIF 版本和缩略图
+
+    不放大图片：宽度超过原图的档位用原图宽度代替。
+    返回原图尺寸与派生文件列表（文件名相对 directory）。
+    """
+    formats = output_formats()
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        width, height = image.size
+
+        targets = sorted({min(w, width) for w in widths})
+        variants = []
+        for target in targets:
+            resized = image if target == width else image.resize(
+                (target, max(1, round(height * target / width))), Image.LANCZOS
+            )
+            for fmt in formats:
+                name = f"{stem}-{target}.{fmt}"
+                _save(resized, directory, name, fmt)
+                variants.append({
+                    "format": fmt,
+                    "width": target,
+                    "height": resized.height,
+                    "file": name,
+                })
+
+        thumbnail = None
+        if formats:
+            thumbnail = f"{stem}-thumb.{formats[0]}"
+            _save(ImageOps.fit(image, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS), directory, thumbnail, formats[0])
+
+    return {"width": width, "height": height, "variants": variants, "thumbnail": thumbnail}
@@ -0,0 +1,163 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+IndexKeys = Tuple[Tuple[str, int], ...]
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """声明式索引定义"""
+    name: str
+    keys: IndexKeys
+    unique: bool = False
+    # 设置后为 TTL 索引（文档在该字段时间之后若干秒被删除）
+    expire_after_seconds: Optional[int] = None
+
+    def to_model(self) -> IndexModel:
+        options: Dict[str, Any] = {"name": self.name, "unique": self.unique}
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return IndexModel(list(self.keys), **options)
+
+
+# 各集合需要的索引（等值字段在前，排序字段在后）
+INDEXES: Dict[str, List[IndexSpec]] = {
+    "blogs": [
+        IndexSpec("date_id", (("date", -1), ("_id", -1))),
+        IndexSpec("published_date_id", (("published", 1), ("date", -1), ("_id", -1))),
+        IndexSpec(
+            "published_category_date_id",
+            (("published", 1), ("category", 1), ("date", -1), ("_id", -1))
+        ),
+        IndexSpec("published_hot_score", (("published", 1), ("hot_score", -1))),
+    ],
+    "events": [
+        IndexSpec("published_date", (("published", 1), ("date", -1))),
+        IndexSpec("date", (("date", 1),)),
+        # 状态调度器按结束时间查找到达边界的活动
+        IndexSpec("end_date", (("end_date", 1),)),
+        # 站点地图取最近修改的活动时间
+        IndexSpec("published_updated_at", (("published", 1), ("updated_at", -1))),
+        IndexSpec(
+            "published_category_status_date",
+            (("published", 1), ("category", 1), ("status", 1), ("date", -1))
+        ),
+    ],
+    "services": [
+        IndexSpec("active_order_created", (("active", 1), ("order", 1), ("created_at", -1))),
+        IndexSpec(
+            "active_category_order_created",
+            (("active", 1), ("category", 1), ("order", 1), ("created_at", -1))
+        ),
+    ],
+    "settings": [
+        IndexSpec("key_unique", (("key", 1),), unique=True),
+    ],
+    "admins": [
+        IndexSpec("username_unique", (("username", 1),), unique=True),
+    ],
+    "revoked_tokens": [
+        # 撤销记录在对应令牌过期后自动删除
+        IndexSpec("expires_at_ttl", (("expires_at", 1),), expire_after_seconds=0),
+    ],
+    "content_changes": [
+        # 轮询按时间读取；各 worker 启动后只需要最近的变更通知
+        IndexSpec("at_ttl", (("at", 1),), expire_after_seconds=24 * 3600),
+    ],
+}
+
+
+# 与各路由实际查询一致的代表性查询，用于 explain 检查：(集合, 条件, 排序)
+QUERY_SHAPES: List[Tuple[str, Dict[str, Any], Optional[List[Tuple[str, int]]]]] = [
+    ("blogs", {}, [("date", -1), ("_id", -1)]),
+    ("blogs", {"published": True}, [("date", -1), ("_id", -1)]),
+    ("blogs", {"published": True, "category": "_"}, [("date", -1), ("_id", -1)]),
+    ("blogs", {"published": True, "hot_score": {"$gt": 0}}, [("hot_score", -1)]),
+    ("events", {"published": True}, [("date", -1)]),
+    ("events", {"published": True, "category": "_", "status": "upcoming"}, [("date", -1)]),
+    ("events", {"published": True, "date": {"$gte": datetime(2000, 1, 1)}}, [("date", 1)]),
+    ("events", {"date": {"$gte": datetime(2000, 1, 1)}}, [("date", 1)]),
+    ("events", {"end_date": {"$gt": datetime(2000, 1, 1)}}, [("end_date", 1)]),
+    ("events", {"published": True, "updated_at": {"$ne": None}}, [("updated_at", -1)]),
+    ("services", {"active": True}, [("order", 1), ("created_at", -1)]),
+    ("services", {"active": True, "category": "_"}, [("order", 1), ("created_at", -1)]),
+    ("settings", {"key": "_"}, None),
+    ("admins", {"username": "_"}, None),
+]
+
+
+def _normalize_keys(key: Any) -> IndexKeys:
+    return tuple((field, int(direction)) for field, direction in key)
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """按注册表对齐索引：创建缺失索引，报告与定义不一致或未登记的索引"""
+    report: Dict[str, List[str]] = {"created": [], "drift": [], "failed": []}
+
+    for collection, specs in INDEXES.items():
+        existing = await db[collection].index_information()
+        by_keys = {_normalize_keys(info["key"]): name for name, info in existing.items()}
+        registered = {spec.name for spec in specs}
+        missing = []
+
+        for spec in specs:
+            info = existing.get(spec.name)
+            if info is None:
+                other = by_keys.get(spec.keys)
+                if other is not None:
+                    report["drift"].append(f"{collection}.{other}: 与 {spec.name} 键相同但名称不同")
+                else:
+                    missing.append(spec)
+            elif (
+                _normalize_keys(info["key"]) != spec.keys
+                or bool(info.get("unique", False)) != spec.unique
+                or info.get("expireAfterSeconds") != spec.expire_after_seconds
+            ):
+                report["drift"].append(f"{collection}.{spec.name}: 定义与注册表不一致")
+
+        # 同键异名的情况已在上面报告过
+        registered_keys = {spec.keys for spec in specs}
+        for name, info in existing.items():
+            if name == "_id_" or name in registered:
+                continue
+            if _normalize_keys(info["key"]) not in registered_keys:
+                report["drift"].append(f"{collection}.{name}: 未在注册表中登记")
+
+        for spec in missing:
+            try:
+                await db[collection].create_indexes([spec.to_model()])
+                report["created"].append(f"{collection}.{spec.name}")
+            except OperationFailure as exc:
+                report["failed"].append(f"{collection}.{spec.name}: {exc}")
+
+    return report
+
+
+def _plan_stages(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(child), dict):
+            yield from _plan_stages(plan[child])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+async def verify_index_usage(db) -> List[str]:
+    """对代表性查询执行 explain，返回仍在全表扫描或内存排序的查询"""
+    problems = []
+    for collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explained = await cursor.explain()
+        winning = explained.get("queryPlanner", {}).get("winningPlan", {})
+        stages = {stage.get("stage") for stage in _plan_stages(winning)}
+        if "COLLSCAN" in stages:
+            problems.append(f"{collection} {query}: 全表扫描")
+        elif "SORT" in stages:
+            problems.append(f"{collection} {query}: 内存排序")
+    return problems
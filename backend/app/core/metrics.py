@@ -0,0 +1,277 @@
+import hmac
+import ipaddress
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from .config import settings
+
+# 延迟直方图分桶（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """累积分桶直方图（Prometheus 语义）"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield repr(bound), total
+        yield "+Inf", total + self.counts[-1]
+
+
+@dataclass
+class RequestStats:
+    """单个请求内发生的 MongoDB 命令统计"""
+    mongo_commands: int = 0
+    mongo_seconds: float = 0.0
+
+
+# 当前请求的统计对象；Motor 在线程池中执行命令时会复制上下文，监听器可以直接读取
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class MetricsRegistry:
+    """请求与 MongoDB 命令的指标汇总"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, str], Histogram] = {}
+        self.request_mongo_seconds: Dict[Tuple[str, str], float] = {}
+        self.request_mongo_commands: Dict[Tuple[str, str], int] = {}
+        self.commands: Dict[Tuple[str, str], Histogram] = {}
+        self.command_failures: Dict[Tuple[str, str], int] = {}
+        self.slow_requests = 0
+        self.slow_queries = 0
+        self._gauges: List[Callable[[], Dict[str, float]]] = []
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route, str(status))
+        with self._lock:
+            histogram = self.requests.get(key)
+            if histogram is None:
+                histogram = self.requests[key] = Histogram()
+            histogram.observe(seconds)
+            route_key = (method, route)
+            self.request_mongo_seconds[route_key] = self.request_mongo_seconds.get(route_key, 0.0) + stats.mongo_seconds
+            self.request_mongo_commands[route_key] = self.request_mongo_commands.get(route_key, 0) + stats.mongo_commands
+
+    def observe_command(self, command: str, collection: str, seconds: float, failed: bool) -> None:
+        key = (command, collection)
+        with self._lock:
+            histogram = self.commands.get(key)
+            if histogram is None:
+                histogram = self.commands[key] = Histogram()
+            histogram.observe(seconds)
+            if failed:
+                self.command_failures[key] = self.command_failures.get(key, 0) + 1
+
+    def register_gauges(self, collector: Callable[[], Dict[str, float]]) -> None:
+        """注册返回 {指标名: 数值} 的回调，导出时读取"""
+        self._gauges.append(collector)
+
+    def render(self) -> str:
+        """导出 Prometheus 文本格式"""
+        lines = [
+            "# HELP http_request_duration_seconds HTTP 请求耗时",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (method, route, status), histogram in sorted(self.requests.items()):
+                labels = f'method="{method}",route="{_escape(route)}",status="{status}"'
+                _render_histogram(lines, "http_request_duration_seconds", labels, histogram)
+
+            lines += [
+                "# HELP http_request_mongo_seconds_total 请求内 MongoDB 命令累计耗时",
+                "# TYPE http_request_mongo_seconds_total counter",
+            ]
+            for (method, route), value in sorted(self.request_mongo_seconds.items()):
+                lines.append(
+                    f'http_request_mongo_seconds_total{{method="{method}",route="{_escape(route)}"}} {value}'
+                )
+            lines += [
+                "# HELP http_request_mongo_commands_total 请求内 MongoDB 命令累计次数",
+                "# TYPE http_request_mongo_commands_total counter",
+            ]
+            for (method, route), value in sorted(self.request_mongo_commands.items()):
+                lines.append(
+                    f'http_request_mongo_commands_total{{method="{method}",route="{_escape(route)}"}} {value}'
+                )
+
+            lines += [
+                "# HELP mongodb_command_duration_seconds MongoDB 命令耗时",
+                "# TYPE mongodb_command_duration_seconds histogram",
+            ]
+            for (command, collection), histogram in sorted(self.commands.items()):
+                labels = f'command="{command}",collection="{_escape(collection)}"'
+                _render_histogram(lines, "mongodb_command_duration_seconds", labels, histogram)
+            lines += [
+                "# HELP mongodb_command_failures_total 失败的 MongoDB 命令数",
+                "# TYPE mongodb_command_failures_total counter",
+            ]
+            for (command, collection), value in sorted(self.command_failures.items()):
+                lines.append(
+                    f'mongodb_command_failures_total{{command="{command}",collection="{_escape(collection)}"}} {value}'
+                )
+
+            lines += [
+                "# TYPE slow_requests_total counter",
+                f"slow_requests_total {self.slow_requests}",
+                "# TYPE slow_queries_total counter",
+                f"slow_queries_total {self.slow_queries}",
+            ]
+
+        for collector in self._gauges:
+            for name, value in collector().items():
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_histogram(lines: List[str], name: str, labels: str, histogram: Histogram) -> None:
+    for bound, count in histogram.cumulative():
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+metrics = MetricsRegistry()
+
+
+def _client_allowed(host: Optional[str]) -> bool:
+    allowed = [entry.strip() for entry in settings.monitoring_allow_ips.split(",") if entry.strip()]
+    if "*" in allowed:
+        return True
+    if host is None:
+        return False
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return host in allowed
+    for entry in allowed:
+        try:
+            if address in ipaddress.ip_network(entry, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def monitoring_allowed(scope, authorization: Optional[str]) -> bool:
+    """监控接口的访问控制：客户端地址在 monitoring_allow_ips 中，或携带 monitoring_token
+
+    经反向代理访问时，对端地址由服务器按 forwarded_allow_ips 换成 X-Forwarded-For 中的客户端地址。
+    """
+    token = settings.monitoring_token
+    if token and authorization:
+        scheme, _, credentials = authorization.partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip(), token):
+            return True
+    client = scope.get("client")
+    return _client_allowed(client[0] if client else None)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """把 MongoDB 命令的次数与耗时归属到发起它的请求，并记录慢查询"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[Any, int], Tuple[str, str]] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ""
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (event.command_name, collection)
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            command, collection = self._pending.pop(
+                (event.connection_id, event.request_id), (event.command_name, "")
+            )
+        seconds = event.duration_micros / 1_000_000
+        metrics.observe_command(command, collection, seconds, failed)
+
+        stats = _current_request.get()
+        if stats is not None:
+            stats.mongo_commands += 1
+            stats.mongo_seconds += seconds
+
+        if seconds * 1000 >= settings.slow_query_ms:
+            metrics.slow_queries += 1
+            print(f"🐢 慢查询 {command} {collection} {seconds * 1000:.1f}ms")
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+
+command_listener = MongoCommandListener()
+
+
+class MetricsMiddleware:
+    """记录每个路由的耗时直方图，并通过 Server-Timing 头区分应用与数据库耗时"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = (time.perf_counter() - started) * 1000
+                timing = (
+                    f"app;dur={elapsed - stats.mongo_seconds * 1000:.1f}, "
+                    f"db;dur={stats.mongo_seconds * 1000:.1f};desc=\"{stats.mongo_commands} commands\""
+                )
+                message.setdefault("headers", []).append((b"server-timing", timing.encode("latin-1")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - started
+            _current_request.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or scope.get("root_path") or "unmatched"
+            metrics.observe_request(scope["method"], route_path, status_code, seconds, stats)
+            if seconds * 1000 >= settings.slow_request_ms:
+                metrics.slow_requests += 1
+                print(
+                    f"🐢 慢请求 {scope['method']} {scope['path']} {status_code} "
+                    f"{seconds * 1000:.1f}ms（MongoDB {stats.mongo_commands} 次 {stats.mongo_seconds * 1000:.1f}ms）"
+                )
@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+
+
+class InvalidCursor(ValueError):
+    """分页游标无法解析"""
+
+
+def encode_cursor(data: Dict[str, Any]) -> str:
+    """将游标数据编码为不透明字符串"""
+    raw = json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """解码不透明游标字符串"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursor(str(exc)) from exc
+    if not isinstance(data, dict):
+        raise InvalidCursor("cursor must be an object")
+    return data
+
+
+def encode_keyset_cursor(doc: Dict[str, Any], field: str = "date") -> str:
+    """根据一页中最后一条文档生成 (field, _id) 键集游标"""
+    value = doc[field]
+    return encode_cursor({
+        "v": value.isoformat() if isinstance(value, datetime) else value,
+        "id": str(doc["_id"]),
+    })
+
+
+def decode_keyset_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """解析 (date, _id) 键集游标"""
+    data = decode_cursor(cursor)
+    try:
+        value = datetime.fromisoformat(data["v"])
+        oid = ObjectId(data["id"])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise InvalidCursor(str(exc)) from exc
+    return value, oid
+
+
+def keyset_filter(
+    cursor: Optional[str],
+    field: str = "date",
+    direction: int = -1
+) -> Optional[Dict[str, Any]]:
+    """构造“从游标之后继续”的查询条件，需配合 (field, _id) 同向排序使用"""
+    if not cursor:
+        return None
+    value, oid = decode_keyset_cursor(cursor)
+    op = "$lt" if direction < 0 else "$gt"
+    return {
+        "$or": [
+            {field: {op: value}},
+            {field: value, "_id": {op: oid}},
+        ]
+    }
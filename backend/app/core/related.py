@@ -0,0 +1,248 @@
+import asyncio
+import math
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from .config import settings
+from .search import tokenize
+
+# 每篇文章保留的相关文章数
+RELATED_COUNT = 6
+
+# 相似度低于该值的文章不作为相关文章
+MIN_SCORE = 0.05
+
+# 综合相似度 = 标签重合度 * TAG_WEIGHT + 正文 TF-IDF 余弦 * (1 - TAG_WEIGHT)
+TAG_WEIGHT = 0.4
+
+# 参与 TF-IDF 的字段权重（标签单独计算重合度）
+TEXT_FIELDS = {"title": 4.0, "excerpt": 2.0, "content": 1.0}
+
+PROJECTION = {name: 1 for name in TEXT_FIELDS} | {"tags": 1, "published": 1}
+
+# 全量构建时分块计算相似度矩阵的行数
+BLOCK_ROWS = 512
+
+
+def _term_counts(doc: Dict[str, Any]) -> Dict[str, float]:
+    counts: Dict[str, float] = {}
+    for name, weight in TEXT_FIELDS.items():
+        for token in tokenize(doc.get(name) or ""):
+            counts[token] = counts.get(token, 0.0) + weight
+    return counts
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def _grow(matrix: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """按需扩容（容量翻倍），保留已有数据"""
+    old_rows, old_cols = matrix.shape
+    if rows <= old_rows and cols <= old_cols:
+        return matrix
+    grown = np.zeros((
+        old_rows if rows <= old_rows else max(rows, old_rows * 2, 16),
+        old_cols if cols <= old_cols else max(cols, old_cols * 2, 16),
+    ), dtype=np.float32)
+    grown[:old_rows, :old_cols] = matrix
+    return grown
+
+
+class RelatedIndex:
+    """相关文章索引
+
+    每篇已发布文章对应一行 L2 归一化的 TF-IDF 向量和标签向量，
+    相似度由矩阵乘法一次算出，邻居列表预先算好，请求时直接查表。
+    词表与 IDF 在全量构建时确定（按文档频率截取前 related_max_terms 个词），
+    增量更新只重算受影响文章的邻居：原本引用该文章的，以及新相似度足以进入其前 N 名的。
+
+    计算都在线程池中进行，修改由一把锁串行化；全量构建在新对象上完成后
+    回到事件循环整体替换，读者只会看到构建前或构建后的邻居表。
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.vocab: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.tag_vocab: Dict[str, int] = {}
+        self.text = np.zeros((0, 0), dtype=np.float32)
+        self.tags = np.zeros((0, 0), dtype=np.float32)
+        self.kth = np.zeros(0, dtype=np.float32)
+        self.neighbors: Dict[str, List[Tuple[str, float]]] = {}
+        self.referrers: Dict[str, Set[str]] = {}
+
+    # ---- 向量 ----
+
+    def _text_vector(self, doc: Dict[str, Any]) -> np.ndarray:
+        vector = np.zeros(len(self.vocab), dtype=np.float32)
+        for term, count in _term_counts(doc).items():
+            index = self.vocab.get(term)
+            if index is not None:
+                vector[index] = (1.0 + math.log(count)) * self.idf[index]
+        return _normalize(vector)
+
+    def _tag_vector(self, tags: Iterable[str]) -> np.ndarray:
+        for tag in tags:
+            if tag not in self.tag_vocab:
+                self.tag_vocab[tag] = len(self.tag_vocab)
+        self.tags = _grow(self.tags, self.tags.shape[0], len(self.tag_vocab))
+        vector = np.zeros(self.tags.shape[1], dtype=np.float32)
+        for tag in tags:
+            vector[self.tag_vocab[tag]] = 1.0
+        return _normalize(vector)
+
+    def _scores(self, rows: np.ndarray) -> np.ndarray:
+        """指定行与全部文章的综合相似度（自身为 -inf）"""
+        n = len(self.ids)
+        scores = (1 - TAG_WEIGHT) * (self.text[rows] @ self.text[:n].T)
+        scores += TAG_WEIGHT * (self.tags[rows] @ self.tags[:n].T)
+        scores[np.arange(len(rows)), rows] = -np.inf
+        return scores
+
+    # ---- 邻居 ----
+
+    def _set_neighbors(self, row: int, scores: np.ndarray) -> None:
+        doc_id = self.ids[row]
+        k = min(RELATED_COUNT, len(scores) - 1)
+        if k > 0:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            ranked = [(self.ids[i], float(scores[i])) for i in top if scores[i] >= MIN_SCORE]
+        else:
+            ranked = []
+
+        for old_id, _ in self.neighbors.get(doc_id, ()):
+            self.referrers.get(old_id, set()).discard(doc_id)
+        for new_id, _ in ranked:
+            self.referrers.setdefault(new_id, set()).add(doc_id)
+        self.neighbors[doc_id] = ranked
+        # 列表未满时任何达到阈值的文章都能进入
+        self.kth[row] = ranked[-1][1] if len(ranked) == RELATED_COUNT else MIN_SCORE
+
+    def _refresh(self, rows: Iterable[int]) -> None:
+        rows = np.fromiter(rows, dtype=np.int64)
+        for start in range(0, len(rows), BLOCK_ROWS):
+            block = rows[start:start + BLOCK_ROWS]
+            for row, scores in zip(block, self._scores(block)):
+                self._set_neighbors(int(row), scores)
+
+    # ---- 全量构建 ----
+
+    def _build(self, docs: List[Dict[str, Any]]) -> None:
+        counts = [_term_counts(doc) for doc in docs]
+        n = len(docs)
+
+        df: Dict[str, int] = {}
+        for terms in counts:
+            for term in terms:
+                df[term] = df.get(term, 0) + 1
+        # 去掉只出现一次和过于普遍的词（语料很小时保留全部）
+        if n >= 20:
+            df = {term: freq for term, freq in df.items() if 2 <= freq <= n * 0.5}
+        kept = sorted(df, key=lambda term: (-df[term], term))[:settings.related_max_terms]
+
+        self.clear()
+        self.vocab = {term: index for index, term in enumerate(kept)}
+        self.idf = np.array(
+            [math.log((1 + n) / (1 + df[term])) + 1.0 for term in kept], dtype=np.float32
+        )
+        self.text = np.zeros((n, len(kept)), dtype=np.float32)
+        self.kth = np.full(n, MIN_SCORE, dtype=np.float32)
+        for doc in docs:
+            self._append(str(doc["_id"]), doc)
+        self._refresh(range(n))
+
+    def _append(self, doc_id: str, doc: Dict[str, Any]) -> int:
+        row = len(self.ids)
+        self.ids.append(doc_id)
+        self.rows[doc_id] = row
+        self.text = _grow(self.text, row + 1, len(self.vocab))
+        tag_vector = self._tag_vector(list(dict.fromkeys(doc.get("tags") or ())))
+        self.tags = _grow(self.tags, row + 1, self.tags.shape[1])
+        if self.kth.shape[0] <= row:
+            self.kth = np.concatenate([self.kth, np.full(max(row, 16), MIN_SCORE, dtype=np.float32)])
+        self.text[row] = self._text_vector(doc)
+        self.tags[row] = tag_vector
+        return row
+
+    async def rebuild(self, db) -> None:
+        """从数据库全量构建（计算在线程池中进行）"""
+        async with self._lock:
+            # 持锁读取，等待中的增量更新在替换之后应用，不会被旧语料覆盖
+            docs = await db.blogs.find({"published": True}, PROJECTION).to_list(None)
+            fresh = RelatedIndex()
+            await asyncio.get_running_loop().run_in_executor(None, fresh._build, docs)
+            for name, value in vars(fresh).items():
+                if name != "_lock":
+                    setattr(self, name, value)
+
+    # ---- 增量维护 ----
+
+    async def upsert(self, doc: Dict[str, Any]) -> None:
+        """新增或更新一篇文章，只重算受影响文章的邻居"""
+        async with self._lock:
+            await asyncio.get_running_loop().run_in_executor(None, self._upsert, doc)
+
+    async def remove(self, doc_id: str) -> None:
+        async with self._lock:
+            await asyncio.get_running_loop().run_in_executor(None, self._remove, doc_id)
+
+    def _upsert(self, doc: Dict[str, Any]) -> None:
+        doc_id = str(doc["_id"])
+        if not doc.get("published", True):
+            self._remove(doc_id)
+            return
+
+        row = self.rows.get(doc_id)
+        if row is None:
+            row = self._append(doc_id, doc)
+        else:
+            tag_vector = self._tag_vector(list(dict.fromkeys(doc.get("tags") or ())))
+            self.text[row] = self._text_vector(doc)
+            self.tags[row] = tag_vector
+
+        scores = self._scores(np.array([row]))[0]
+        self._set_neighbors(row, scores)
+
+        n = len(self.ids)
+        affected = set(np.nonzero(scores[:n] >= self.kth[:n])[0].tolist())
+        affected.update(self.rows[other] for other in self.referrers.get(doc_id, ()))
+        affected.discard(row)
+        self._refresh(sorted(affected))
+
+    def _remove(self, doc_id: str) -> None:
+        row = self.rows.pop(doc_id, None)
+        if row is None:
+            return
+
+        # 末行移到被删除的位置，保持矩阵紧凑
+        last = len(self.ids) - 1
+        if row != last:
+            moved = self.ids[last]
+            self.ids[row] = moved
+            self.rows[moved] = row
+            self.text[row] = self.text[last]
+            self.tags[row] = self.tags[last]
+            self.kth[row] = self.kth[last]
+        self.ids.pop()
+        self.text[last] = 0
+        self.tags[last] = 0
+
+        for neighbor_id, _ in self.neighbors.pop(doc_id, ()):
+            self.referrers.get(neighbor_id, set()).discard(doc_id)
+        affected = self.referrers.pop(doc_id, set())
+        self._refresh(sorted(self.rows[other] for other in affected))
+
+    def related(self, doc_id: str) -> List[Tuple[str, float]]:
+        return self.neighbors.get(doc_id, [])
+
+
+related_index = RelatedIndex()
@@ -0,0 +1,108 @@
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+
+from .database import get_database
+
+
+class Repository:
+    """单个集合的数据访问层
+
+    统一 ObjectId 校验、_id 字符串化和“不存在”处理，
+    更新、删除、upsert 均为单次原子操作并直接返回结果文档。
+    """
+
+    def __init__(self, collection: str, label: str):
+        self.collection_name = collection
+        self.label = label
+
+    @property
+    def collection(self):
+        return get_database()[self.collection_name]
+
+    @staticmethod
+    def stringify(doc: Dict[str, Any]) -> Dict[str, Any]:
+        doc["_id"] = str(doc["_id"])
+        return doc
+
+    def object_id(self, doc_id: str) -> ObjectId:
+        """解析 ObjectId，无效时返回 400"""
+        if not ObjectId.is_valid(doc_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"无效的{self.label}ID"
+            )
+        return ObjectId(doc_id)
+
+    def not_found(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{self.label}不存在"
+        )
+
+    async def get(self, doc_id: str, projection: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """按 ID 查询，不存在时返回 404（_id 保持 ObjectId）"""
+        doc = await self.collection.find_one({"_id": self.object_id(doc_id)}, projection)
+        if doc is None:
+            raise self.not_found()
+        return doc
+
+    async def insert(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """插入文档并返回 _id 已字符串化的文档"""
+        result = await self.collection.insert_one(doc)
+        doc["_id"] = str(result.inserted_id)
+        return doc
+
+    async def update(self, doc_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """原子地 $set 并返回更新后的文档，不存在时返回 404"""
+        if not fields:
+            return self.stringify(await self.get(doc_id))
+        doc = await self.collection.find_one_and_update(
+            {"_id": self.object_id(doc_id)},
+            {"$set": fields},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            raise self.not_found()
+        return self.stringify(doc)
+
+    async def upsert(
+        self,
+        query: Dict[str, Any],
+        fields: Dict[str, Any],
+        on_insert: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """原子地更新或插入，返回 (文档, 是否为新建)"""
+        # 预先生成 _id：返回文档的 _id 与之相同即说明是本次插入的
+        new_id = ObjectId()
+        doc = await self.collection.find_one_and_update(
+            query,
+            {"$set": fields, "$setOnInsert": {**(on_insert or {}), "_id": new_id}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        created = doc["_id"] == new_id
+        return self.stringify(doc), created
+
+    async def delete(
+        self, doc_id: str, projection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """原子地删除并返回被删除的文档，不存在时返回 404"""
+        return await self.delete_by({"_id": self.object_id(doc_id)}, projection)
+
+    async def delete_by(
+        self, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """按条件原子地删除一条文档并返回，不存在时返回 404"""
+        doc = await self.collection.find_one_and_delete(query, projection)
+        if doc is None:
+            raise self.not_found()
+        return self.stringify(doc)
+
+
+blog_repo = Repository("blogs", "文章")
+event_repo = Repository("events", "活动")
+service_repo = Repository("services", "服务")
+settings_repo = Repository("settings", "设置")
@@ -0,0 +1,291 @@
+import html
+import math
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 字段权重：标题 > 标签 > 摘要 > 正文
+FIELD_WEIGHTS = {
+    "title": 4.0,
+    "tags": 3.0,
+    "excerpt": 2.0,
+    "content": 1.0,
+}
+
+# 建索引时需要从数据库读取的字段
+INDEX_PROJECTION = {name: 1 for name in FIELD_WEIGHTS} | {
+    "published": 1, "category": 1, "date": 1
+}
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 最后一个查询词按前缀匹配（边输入边搜索）：最短前缀长度、最多展开的词数，
+# 以及前缀展开词相对完整命中的权重
+PREFIX_MIN_CHARS = 2
+PREFIX_MAX_TERMS = 50
+PREFIX_WEIGHT = 0.8
+
+# 中日韩统一表意文字及假名、谚文
+_CJK = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+", re.UNICODE)
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+
+def _is_cjk(run: str) -> bool:
+    return bool(_CJK_RE.match(run))
+
+
+def tokenize(text: str) -> List[str]:
+    """分词：拉丁文按单词切分并小写，中日韩文本切分为单字与双字组"""
+    tokens = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if _is_cjk(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def tokenize_query(text: str) -> List[str]:
+    """查询分词：中日韩文本优先使用双字组，避免单字匹配过宽"""
+    terms = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if _is_cjk(run) and len(run) > 1:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.append(run)
+    return list(dict.fromkeys(terms))
+
+
+def _field_text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return str(value or "")
+
+
+@dataclass
+class _IndexedDoc:
+    terms: Dict[str, float]
+    length: float
+    published: bool
+    category: str
+    date: Optional[datetime]
+
+
+@dataclass
+class SearchHit:
+    id: str
+    score: float
+
+
+@dataclass
+class SearchIndex:
+    """进程内加权倒排索引
+
+    由 create_blog / update_blog / delete_blog 增量维护，启动时从数据库全量构建。
+    多进程部署时每个 worker 各自持有一份索引。
+    """
+
+    postings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    docs: Dict[str, _IndexedDoc] = field(default_factory=dict)
+    total_length: float = 0.0
+    # 排序后的词表（前缀匹配用），词表变化后在下一次前缀查询时重建
+    _vocabulary: List[str] = field(default_factory=list, init=False, repr=False)
+    _vocabulary_stale: bool = field(default=False, init=False, repr=False)
+
+    def upsert(self, doc: Dict[str, Any]) -> None:
+        """新增或更新一篇文章的索引"""
+        doc_id = str(doc["_id"])
+        self.remove(doc_id)
+
+        terms: Dict[str, float] = {}
+        for name, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(_field_text(doc.get(name))):
+                terms[token] = terms.get(token, 0.0) + weight
+
+        length = sum(terms.values())
+        self.docs[doc_id] = _IndexedDoc(
+            terms=terms,
+            length=length,
+            published=bool(doc.get("published", True)),
+            category=doc.get("category", ""),
+            date=doc.get("date"),
+        )
+        self.total_length += length
+        for term, tf in terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                self._vocabulary_stale = True
+            posting[doc_id] = tf
+
+    def remove(self, doc_id: str) -> None:
+        """从索引中移除一篇文章"""
+        indexed = self.docs.pop(doc_id, None)
+        if indexed is None:
+            return
+        self.total_length -= indexed.length
+        for term in indexed.terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self.postings[term]
+                self._vocabulary_stale = True
+
+    def clear(self) -> None:
+        self.postings.clear()
+        self.docs.clear()
+        self.total_length = 0.0
+        self._vocabulary = []
+        self._vocabulary_stale = False
+
+    async def rebuild(self, db) -> None:
+        """从数据库全量重建索引"""
+        self.clear()
+        async for doc in db.blogs.find({}, INDEX_PROJECTION):
+            self.upsert(doc)
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        """词表中以 prefix 开头的词（不含 prefix 本身），按文档频率取前 PREFIX_MAX_TERMS 个"""
+        if self._vocabulary_stale:
+            self._vocabulary = sorted(self.postings)
+            self._vocabulary_stale = False
+        matches = []
+        for index in range(bisect_left(self._vocabulary, prefix), len(self._vocabulary)):
+            term = self._vocabulary[index]
+            if not term.startswith(prefix):
+                break
+            if term != prefix:
+                matches.append(term)
+        if len(matches) > PREFIX_MAX_TERMS:
+            matches.sort(key=lambda term: len(self.postings[term]), reverse=True)
+            matches = matches[:PREFIX_MAX_TERMS]
+        return matches
+
+    def _clauses(self, terms: List[str]) -> List[List[Tuple[str, Dict[str, float], float]]]:
+        """每个查询词对应一组 (词, 倒排表, 权重)；最后一个拉丁文词同时匹配以它开头的词"""
+        clauses = []
+        for position, term in enumerate(terms):
+            clause = []
+            posting = self.postings.get(term)
+            if posting:
+                clause.append((term, posting, 1.0))
+            if (
+                position == len(terms) - 1
+                and len(term) >= PREFIX_MIN_CHARS
+                and not _is_cjk(term)
+            ):
+                clause.extend(
+                    (expanded, self.postings[expanded], PREFIX_WEIGHT)
+                    for expanded in self._prefix_terms(term)
+                )
+            clauses.append(clause)
+        return clauses
+
+    def search(
+        self,
+        query: str,
+        published_only: bool = True,
+        category: Optional[str] = None
+    ) -> List[SearchHit]:
+        """按相关度排序返回匹配的文章
+
+        所有查询词都需命中，最后一个词也可以只是某个词的前缀（如 fast 命中 FastAPI）。
+        """
+        terms = tokenize_query(query)
+        if not terms or not self.docs:
+            return []
+
+        clauses = self._clauses(terms)
+        if not all(clauses):
+            return []
+        matched = [{doc_id for _, posting, _ in clause for doc_id in posting} for clause in clauses]
+
+        # 从最小的候选集合开始求交集
+        matched.sort(key=len)
+        candidates = matched[0]
+        for docs in matched[1:]:
+            candidates = candidates & docs
+            if not candidates:
+                return []
+
+        n_docs = len(self.docs)
+        avg_length = self.total_length / n_docs if n_docs else 1.0
+        idf = {
+            term: math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for clause in clauses for term, posting, _ in clause
+        }
+
+        hits = []
+        for doc_id in candidates:
+            indexed = self.docs[doc_id]
+            if published_only and not indexed.published:
+                continue
+            if category and indexed.category != category:
+                continue
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * indexed.length / avg_length)
+            score = 0.0
+            for clause in clauses:
+                # 同一查询词的多个展开只取得分最高的一个
+                score += max(
+                    weight * idf[term] * posting[doc_id] * (BM25_K1 + 1) / (posting[doc_id] + norm)
+                    for term, posting, weight in clause if doc_id in posting
+                )
+            hits.append((score, indexed.date or datetime.min, doc_id))
+
+        hits.sort(reverse=True)
+        return [SearchHit(id=doc_id, score=score) for score, _, doc_id in hits]
+
+
+def _highlight_pattern(query: str) -> Optional[re.Pattern]:
+    words = [w for w in query.split() if w]
+    if not words:
+        return None
+    words.sort(key=len, reverse=True)
+    return re.compile("|".join(re.escape(w) for w in words), re.IGNORECASE)
+
+
+def _mark(text: str, pattern: re.Pattern) -> str:
+    parts = []
+    last = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[last:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group(0))}</mark>")
+        last = match.end()
+    parts.append(html.escape(text[last:]))
+    return "".join(parts)
+
+
+def highlight(
+    doc: Dict[str, Any],
+    query: str,
+    fields: Iterable[str] = ("title", "excerpt", "content"),
+    snippet_chars: int = 80
+) -> Dict[str, str]:
+    """为命中字段生成 HTML 转义后的 <mark> 高亮片段"""
+    pattern = _highlight_pattern(query)
+    if pattern is None:
+        return {}
+
+    result = {}
+    for name in fields:
+        text = _field_text(doc.get(name))
+        match = pattern.search(text)
+        if not match:
+            continue
+        if len(text) > snippet_chars * 2:
+            start = max(0, match.start() - snippet_chars // 2)
+            end = min(len(text), start + snippet_chars * 2)
+            text = ("…" if start else "") + text[start:end] + ("…" if end < len(text) else "")
+        result[name] = _mark(text, pattern)
+    return result
+
+
+search_index = SearchIndex()
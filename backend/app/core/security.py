@@ -1,8 +1,15 @@
-from datetime import datetime, timedelta
-from typing import Optional
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from pymongo.errors import OperationFailure, PyMongoError
 from .config import settings
+from .settings_store import CHANGE_STREAM_UNSUPPORTED, WATCH_RETRY_SECONDS
 
 # 密码加密上下文
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -18,6 +25,87 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordPoolBusy(Exception):
+    """密码计算线程池排队已满"""
+
+
+class PasswordWorkerPool:
+    """bcrypt 计算专用的有界线程池
+
+    并发数由信号量限制为 max_workers，超出的请求排队等待；
+    排队数超过 max_queue 时直接拒绝，避免登录洪峰拖垮事件循环和普通读者请求。
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = asyncio.Semaphore(max_workers)
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """在线程池中执行 fn，队列已满时抛出 PasswordPoolBusy"""
+        if self.waiting >= self.max_queue and self.running >= self.max_workers:
+            self.rejected += 1
+            raise PasswordPoolBusy()
+
+        self.waiting += 1
+        queued_at = time.monotonic()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        wait = time.monotonic() - queued_at
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        started = self.completed + self.running
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait / started * 1000, 2) if started else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_pool = PasswordWorkerPool(
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """在密码线程池中验证密码，不阻塞事件循环"""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """在密码线程池中计算密码哈希，不阻塞事件循环"""
+    return await password_pool.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """创建访问令牌"""
     to_encode = data.copy()
@@ -26,15 +114,194 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
 
+# 撤销记录所在集合（expires_at 上的 TTL 索引清理已过期的记录）
+REVOCATIONS = "revoked_tokens"
+
+
+def _to_mongo_time(timestamp: float) -> datetime:
+    # 与 MongoDB 读出的时间一致：不带时区的 UTC 时间
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _from_mongo_time(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class VerifiedTokenCache:
+    """已验证令牌缓存
+
+    以令牌摘要为键缓存解码结果，过期时间不晚于令牌自身的 exp，
+    命中时跳过签名校验。撤销的令牌记录在拒绝列表中直到其自然过期。
+    撤销记录同时写入 revoked_tokens 集合：启动时加载，运行中通过 change stream
+    （不支持时定期轮询）同步其他 worker 的撤销，校验令牌本身仍只访问内存。
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._revoked: Dict[str, float] = {}
+        self._revoked_users: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revocation_mode = "static"
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, digest: str) -> Optional[dict]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return payload
+
+    def put(self, digest: str, payload: dict) -> None:
+        expires_at = time.time() + self.ttl
+        if "exp" in payload:
+            expires_at = min(expires_at, float(payload["exp"]))
+        self._entries[digest] = (payload, expires_at)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def is_revoked(self, digest: str, payload: Optional[dict] = None) -> bool:
+        if digest in self._revoked:
+            return True
+        if payload is not None:
+            revoked_before = self._revoked_users.get(str(payload.get("id")))
+            if revoked_before is not None and float(payload.get("iat", 0)) < revoked_before:
+                return True
+        return False
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        """把一条撤销记录合并到本进程的拒绝列表"""
+        if "user_id" in record:
+            user_id = str(record["user_id"])
+            revoked_before = float(record["revoked_before"])
+            self._revoked_users[user_id] = max(self._revoked_users.get(user_id, 0.0), revoked_before)
+            for digest in [k for k, (p, _) in self._entries.items() if str(p.get("id")) == user_id]:
+                del self._entries[digest]
+        else:
+            digest = record["_id"]
+            self._revoked[digest] = _from_mongo_time(record["expires_at"])
+            self._entries.pop(digest, None)
+
+    def _prune(self) -> None:
+        # 清理已自然过期的拒绝记录
+        now = time.time()
+        for key in [k for k, v in self._revoked.items() if v <= now]:
+            del self._revoked[key]
+
+    async def _save(self, db, record: Dict[str, Any]) -> None:
+        self._apply(record)
+        self._prune()
+        await db[REVOCATIONS].replace_one({"_id": record["_id"]}, record, upsert=True)
+
+    async def revoke(self, db, token: str, payload: Optional[dict] = None) -> None:
+        """撤销单个令牌（如退出登录）"""
+        exp = float(payload["exp"]) if payload and "exp" in payload else time.time() + self.ttl
+        await self._save(db, {"_id": self.digest(token), "expires_at": _to_mongo_time(exp)})
+
+    async def revoke_user(self, db, user_id: str) -> None:
+        """撤销某个用户在此之前签发的所有令牌（如修改密码）"""
+        # iat 精度为秒，同一秒内重新签发的令牌仍然有效
+        revoked_before = float(int(time.time()))
+        expires_at = revoked_before + settings.access_token_expire_minutes * 60
+        await self._save(db, {
+            "_id": f"user:{user_id}",
+            "user_id": str(user_id),
+            "revoked_before": revoked_before,
+            "expires_at": _to_mongo_time(expires_at),
+        })
+
+    async def load_revocations(self, db) -> int:
+        """从数据库加载尚未过期的撤销记录，返回记录数"""
+        records = await db[REVOCATIONS].find(
+            {"expires_at": {"$gt": _to_mongo_time(time.time())}}
+        ).to_list(None)
+        for record in records:
+            self._apply(record)
+        self._prune()
+        return len(records)
+
+    async def watch_revocations(self, db) -> None:
+        """持续同步其他进程写入的撤销记录（作为后台任务运行）"""
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "replace", "update"]}}}]
+        while True:
+            try:
+                self.revocation_mode = "change_stream"
+                async with db[REVOCATIONS].watch(pipeline, full_document="updateLookup") as stream:
+                    # 建立监听后再加载一次，补上监听建立之前的撤销
+                    await self.load_revocations(db)
+                    async for change in stream:
+                        if change.get("fullDocument"):
+                            self._apply(change["fullDocument"])
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED or "replica set" in str(e):
+                    print("ℹ️  MongoDB 不支持 change stream，令牌撤销记录改为定期轮询")
+                    await self.poll_revocations(db)
+                    return
+                print(f"⚠️  令牌撤销 change stream 中断：{e}")
+            except PyMongoError as e:
+                print(f"⚠️  令牌撤销 change stream 中断：{e}")
+            await asyncio.sleep(WATCH_RETRY_SECONDS)
+
+    async def poll_revocations(self, db) -> None:
+        self.revocation_mode = "polling"
+        while True:
+            await asyncio.sleep(settings.token_revocation_poll_interval_seconds)
+            try:
+                await self.load_revocations(db)
+            except PyMongoError as e:
+                print(f"⚠️  令牌撤销记录轮询失败：{e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "revoked": len(self._revoked),
+            "revocation_mode": self.revocation_mode,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+token_cache = VerifiedTokenCache(
+    max_entries=settings.token_cache_max_entries,
+    ttl=settings.token_cache_ttl_seconds,
+)
+
+
 def verify_token(token: str) -> Optional[dict]:
-    """验证令牌"""
+    """验证令牌（优先使用已验证令牌缓存）"""
+    digest = token_cache.digest(token)
+    if token_cache.is_revoked(digest):
+        return None
+    
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        return payload
     except JWTError:
         return None
+    
+    if token_cache.is_revoked(digest, payload):
+        return None
+    
+    token_cache.put(digest, payload)
+    return payload
@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Type
+
+import orjson
+from bson import Decimal128, ObjectId
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+
+def _default(value: Any) -> Any:
+    """orjson 无法原生处理的 BSON 类型"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(data: Any) -> bytes:
+    """一次遍历完成 BSON -> JSON 序列化（ObjectId 直接转为字符串）"""
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+@dataclass(frozen=True)
+class CompiledModel:
+    """为可信的数据库输出预先编译的响应模型
+
+    projection 保证查询只返回模型中的字段，defaults 补齐旧文档缺失的字段，
+    从而可以跳过逐文档的 Pydantic 校验，输出与 response_model 保持一致。
+    """
+    projection: Dict[str, int]
+    defaults: Dict[str, Any]
+
+    def prepare(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        if self.defaults.keys() <= doc.keys():
+            return doc
+        return {**self.defaults, **doc}
+
+
+@lru_cache(maxsize=None)
+def compile_model(model: Type[BaseModel]) -> CompiledModel:
+    projection = {}
+    defaults = {}
+    for name, info in model.model_fields.items():
+        key = info.alias or name
+        projection[key] = 1
+        # default_factory（如 datetime.now）只用于新建文档，不用于补齐
+        if info.default is not PydanticUndefined:
+            defaults[key] = info.default
+    return CompiledModel(projection=projection, defaults=defaults)
+
+
+def projection_for(model: Type[BaseModel]) -> Dict[str, int]:
+    """响应模型对应的 MongoDB 投影"""
+    return compile_model(model).projection
+
+
+def render_document(doc: Dict[str, Any], model: Type[BaseModel]) -> bytes:
+    """序列化单个可信文档"""
+    return dumps(compile_model(model).prepare(doc))
+
+
+def render_documents(docs: Iterable[Dict[str, Any]], model: Type[BaseModel]) -> bytes:
+    """序列化可信文档列表"""
+    compiled = compile_model(model)
+    return dumps([compiled.prepare(doc) for doc in docs])
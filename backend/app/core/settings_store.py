@@ -0,0 +1,105 @@
+import asyncio
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from .cache import CacheEntry, document_timestamp
+from .config import settings
+from .serialization import dumps
+
+# 单节点 mongod 不支持 change stream 时返回的错误码
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+# change stream 意外中断后的重试间隔（秒）
+WATCH_RETRY_SECONDS = 5
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    """某一时刻全部设置的只读快照，附带预先序列化好的响应"""
+    values: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    all_entry: CacheEntry = field(default_factory=lambda: CacheEntry(body=b"{}"))
+    entries: Mapping[str, CacheEntry] = field(default_factory=lambda: MappingProxyType({}))
+
+
+def build_snapshot(docs: List[Dict[str, Any]]) -> SettingsSnapshot:
+    values = {doc["key"]: doc.get("value") for doc in docs}
+    entries = {
+        doc["key"]: CacheEntry(
+            body=dumps({"key": doc["key"], "value": doc.get("value")}),
+            last_modified=document_timestamp(doc)
+        )
+        for doc in docs
+    }
+    timestamps = [stamp for stamp in map(document_timestamp, docs) if stamp is not None]
+    return SettingsSnapshot(
+        values=MappingProxyType(values),
+        all_entry=CacheEntry(body=dumps(values), last_modified=max(timestamps, default=None)),
+        entries=MappingProxyType(entries),
+    )
+
+
+class SettingsStore:
+    """设置的内存快照
+
+    读取只访问当前快照，从不查询数据库；快照整体替换，读者不会看到中间状态。
+    本进程的修改接口写库后立即重载；其他 worker 的修改通过 change stream 感知，
+    单节点 mongod 不支持 change stream 时退化为定期轮询。
+    """
+
+    def __init__(self):
+        self.snapshot = SettingsSnapshot()
+        self.mode = "static"
+        self.reloads = 0
+
+    async def reload(self, db) -> SettingsSnapshot:
+        docs = await db.settings.find(
+            {}, {"key": 1, "value": 1, "created_at": 1, "updated_at": 1}
+        ).to_list(None)
+        snapshot = build_snapshot(docs)
+        # 内容未变时保留旧快照，ETag 与 Last-Modified 保持稳定
+        if snapshot.values == self.snapshot.values:
+            return self.snapshot
+        self.snapshot = snapshot
+        self.reloads += 1
+        return snapshot
+
+    async def watch(self, db) -> None:
+        """持续跟踪其他进程对设置的修改（作为后台任务运行）"""
+        while True:
+            try:
+                self.mode = "change_stream"
+                async with db.settings.watch() as stream:
+                    # 建立监听后再重载一次，补上监听建立之前的修改
+                    await self.reload(db)
+                    async for _ in stream:
+                        await self.reload(db)
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED or "replica set" in str(e):
+                    print("ℹ️  MongoDB 不支持 change stream，设置改为定期轮询")
+                    await self.poll(db)
+                    return
+                print(f"⚠️  设置 change stream 中断：{e}")
+            except PyMongoError as e:
+                print(f"⚠️  设置 change stream 中断：{e}")
+            await asyncio.sleep(WATCH_RETRY_SECONDS)
+
+    async def poll(self, db) -> None:
+        self.mode = "polling"
+        while True:
+            await asyncio.sleep(settings.site_settings_poll_interval_seconds)
+            try:
+                await self.reload(db)
+            except PyMongoError as e:
+                print(f"⚠️  设置轮询失败：{e}")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        return self.snapshot.entries.get(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "keys": len(self.snapshot.values), "reloads": self.reloads}
+
+
+settings_store = SettingsStore()
@@ -0,0 +1,212 @@
+import os
+import re
+from mimetypes import guess_type
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from .config import settings
+
+# 内容寻址的文件名（哈希前缀 + 可选派生后缀），内容永不改变
+HASHED_NAME = re.compile(r"^[0-9a-f]{32}(-[0-9a-z]+)?\.[0-9a-z]+$")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# 预压缩副本：编码 -> 文件后缀（按优先级）
+SIDECARS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """解析单个字节区间，返回闭区间 (start, end)
+
+    多区间、无法识别或无效（如 bytes=500-400）的格式返回 None，按 RFC 9110 忽略 Range
+    回退为完整响应；起点超出文件长度时抛出 RangeNotSatisfiable。
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # 后缀区间：bytes=-500 表示最后 500 字节
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            start, end = max(0, size - length), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and end < start:
+                return None
+            end = min(end, size - 1)
+    except ValueError:
+        return None
+    if start < 0 or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def from_trusted_proxy(scope) -> bool:
+    """请求是否直接来自受信任的反向代理（forwarded_allow_ips）"""
+    trusted = {address.strip() for address in settings.forwarded_allow_ips.split(",")}
+    if "*" in trusted:
+        return True
+    client = scope.get("client")
+    return client is not None and client[0] in trusted
+
+
+class FileRangeResponse(Response):
+    """发送文件的一个字节区间（206 Partial Content）"""
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, start: int, end: int, headers: dict, method: str):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.status_code = 206
+        self.background = None
+        self.send_header_only = method.upper() == "HEAD"
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # 文件在发送过程中被截断
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class UploadFiles(StaticFiles):
+    """上传目录的静态文件服务
+
+    - 哈希文件名返回 immutable 长缓存，其他文件每次协商
+    - 存在 .br/.gz 预压缩副本时按 Accept-Encoding 直接发送
+    - 支持单区间 Range 请求
+    - 配置 upload_accel_redirect 且请求由受信任的 nginx 转发（带 X-Sendfile-Type: X-Accel-Redirect）时，
+      只返回响应头，由 nginx 通过 sendfile 发送文件；直连客户端自带的该请求头被忽略
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+        name = os.path.basename(full_path)
+        cache_control = IMMUTABLE if HASHED_NAME.match(name) else REVALIDATE
+        media_type = guess_type(name)[0] or "application/octet-stream"
+
+        if (
+            settings.upload_accel_redirect
+            and request_headers.get("x-sendfile-type", "").lower() == "x-accel-redirect"
+            and from_trusted_proxy(scope)
+        ):
+            relative = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+            return Response(
+                status_code=status_code,
+                media_type=media_type,
+                headers={
+                    "x-accel-redirect": settings.upload_accel_redirect.rstrip("/") + "/" + quote(relative),
+                    "cache-control": cache_control,
+                },
+            )
+
+        encoding, served_path, served_stat, has_sidecar = self._negotiate(
+            full_path, stat_result, request_headers
+        )
+        response = FileResponse(
+            served_path,
+            status_code=status_code,
+            media_type=media_type,
+            stat_result=served_stat,
+            method=scope["method"],
+        )
+        response.headers["cache-control"] = cache_control
+        if has_sidecar:
+            response.headers["vary"] = "Accept-Encoding"
+        if encoding:
+            response.headers["content-encoding"] = encoding
+        else:
+            response.headers["accept-ranges"] = "bytes"
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        range_header = request_headers.get("range")
+        if range_header and encoding is None and status_code == 200:
+            if_range = request_headers.get("if-range")
+            if if_range is None or if_range in (response.headers["etag"], response.headers["last-modified"]):
+                return self._range_response(response, served_path, served_stat.st_size, range_header, scope)
+        return response
+
+    def is_not_modified(self, response_headers, request_headers) -> bool:
+        """If-None-Match 按弱比较（压缩中间件会把 ETag 改为 W/ 弱校验器），优先于 If-Modified-Since"""
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is None:
+            return super().is_not_modified(response_headers, request_headers)
+        if if_none_match.strip() == "*":
+            return True
+        etag = response_headers.get("etag", "").removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+    def _negotiate(self, full_path, stat_result, request_headers):
+        """选择预压缩副本，返回 (编码, 文件路径, stat, 是否存在任一副本)"""
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in request_headers.get("accept-encoding", "").split(",")
+        }
+        has_sidecar = False
+        for encoding, suffix in SIDECARS:
+            try:
+                sidecar_stat = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            # 副本比原文件旧时视为失效
+            if sidecar_stat.st_mtime < stat_result.st_mtime:
+                continue
+            has_sidecar = True
+            if encoding in accepted:
+                return encoding, full_path + suffix, sidecar_stat, True
+        return None, full_path, stat_result, has_sidecar
+
+    @staticmethod
+    def _range_response(response: FileResponse, path: str, size: int, range_header: str, scope) -> Response:
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+        if byte_range is None:
+            return response
+
+        start, end = byte_range
+        headers = {
+            key: value for key, value in response.headers.items()
+            if key not in ("content-length", "content-type")
+        }
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+        headers["content-length"] = str(end - start + 1)
+        headers["content-type"] = response.media_type
+        return FileRangeResponse(path, start, end, headers, scope["method"])
@@ -0,0 +1,115 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# 归档月份格式（与聚合管道中的 $dateToString 一致）
+MONTH_FORMAT = "%Y-%m"
+
+# 每篇已发布文章对分类、标签、归档计数的贡献
+_CONTRIBUTION_PIPELINE = [
+    {"$match": {"published": True}},
+    {"$project": {
+        "category": 1,
+        "tags": 1,
+        "month": {"$dateToString": {"format": MONTH_FORMAT, "date": "$date"}},
+    }},
+]
+
+
+@dataclass(frozen=True)
+class _Contribution:
+    category: str
+    tags: Tuple[str, ...]
+    month: Optional[str]
+
+
+def _month_of(value: Any) -> Optional[str]:
+    return value.strftime(MONTH_FORMAT) if isinstance(value, datetime) else None
+
+
+def _bump(counter: Counter, key: str, sign: int) -> None:
+    counter[key] += sign
+    # 计数归零的项直接删除
+    if counter[key] <= 0:
+        del counter[key]
+
+
+def _ranked(counter: Counter, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    return [{"name": name, "count": count} for name, count in counter.most_common(limit)]
+
+
+@dataclass
+class TaxonomySnapshot:
+    """已发布文章的分类计数、标签频次和按月归档
+
+    启动时用聚合管道全量构建，之后由 create_blog / update_blog / delete_blog
+    按每篇文章的贡献增量维护。多进程部署时每个 worker 各自持有一份。
+    """
+
+    contributions: Dict[str, _Contribution] = field(default_factory=dict)
+    categories: Counter = field(default_factory=Counter)
+    tags: Counter = field(default_factory=Counter)
+    archive: Counter = field(default_factory=Counter)
+
+    def _apply(self, contribution: _Contribution, sign: int) -> None:
+        if contribution.category:
+            _bump(self.categories, contribution.category, sign)
+        for tag in contribution.tags:
+            _bump(self.tags, tag, sign)
+        if contribution.month:
+            _bump(self.archive, contribution.month, sign)
+
+    def _add(self, doc_id: str, contribution: _Contribution) -> None:
+        self.remove(doc_id)
+        self.contributions[doc_id] = contribution
+        self._apply(contribution, 1)
+
+    def upsert(self, doc: Dict[str, Any]) -> None:
+        """新增或更新一篇文章的贡献，未发布的文章不计入"""
+        doc_id = str(doc["_id"])
+        if not doc.get("published", True):
+            self.remove(doc_id)
+            return
+        self._add(doc_id, _Contribution(
+            category=doc.get("category") or "",
+            tags=tuple(dict.fromkeys(doc.get("tags") or ())),
+            month=_month_of(doc.get("date")),
+        ))
+
+    def remove(self, doc_id: str) -> None:
+        contribution = self.contributions.pop(doc_id, None)
+        if contribution is not None:
+            self._apply(contribution, -1)
+
+    def clear(self) -> None:
+        self.contributions.clear()
+        self.categories.clear()
+        self.tags.clear()
+        self.archive.clear()
+
+    async def rebuild(self, db) -> None:
+        """通过聚合管道全量重建"""
+        self.clear()
+        async for row in db.blogs.aggregate(_CONTRIBUTION_PIPELINE):
+            self._add(str(row["_id"]), _Contribution(
+                category=row.get("category") or "",
+                tags=tuple(dict.fromkeys(row.get("tags") or ())),
+                month=row.get("month"),
+            ))
+
+    def category_counts(self) -> List[Dict[str, Any]]:
+        return _ranked(self.categories)
+
+    def tag_counts(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return _ranked(self.tags, limit)
+
+    def archive_counts(self) -> List[Dict[str, Any]]:
+        """按月份倒序"""
+        return [
+            {"month": month, "count": self.archive[month]}
+            for month in sorted(self.archive, reverse=True)
+        ]
+
+
+taxonomy = TaxonomySnapshot()
@@ -0,0 +1,224 @@
+import asyncio
+import gzip
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+try:
+    import brotli
+except ImportError:  # 未安装时只生成 .gz 副本
+    brotli = None
+
+from . import images
+from .config import settings
+from .database import get_database
+
+# 静态文件挂载路径
+URL_PREFIX = "/uploads"
+
+# 派生图宽度档位（不超过原图宽度）
+VARIANT_WIDTHS = (480, 960, 1600)
+
+# 按扩展名接受的非图片文件
+MEDIA_TYPES = {
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".mp3": "audio/mpeg",
+    ".pdf": "application/pdf",
+}
+
+# 值得预压缩的类型（图片和音视频本身已压缩）
+COMPRESSIBLE_TYPES = {"application/pdf"}
+
+# 内容寻址文件名使用的哈希前缀长度（十六进制字符）
+STEM_LENGTH = 32
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def sniff_image(head: bytes) -> Optional[Tuple[str, str]]:
+    """根据文件头识别图片格式，返回 (扩展名, Content-Type)"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg", "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png", "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return ".gif", "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp", "image/webp"
+    if head[4:12] in (b"ftypavif", b"ftypavis"):
+        return ".avif", "image/avif"
+    return None
+
+
+def _image_pool() -> ProcessPoolExecutor:
+    """图片处理进程池（首次使用时创建；spawn 避免 fork 带入驱动线程）"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.image_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_image_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def write_sidecars(path: str) -> None:
+    """为可压缩文件生成 .gz / .br 预压缩副本，由静态文件服务按 Accept-Encoding 选用"""
+    with open(path, "rb") as f:
+        data = f.read()
+    sidecars = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        sidecars.append((".br", brotli.compress(data, quality=11)))
+    for suffix, compressed in sidecars:
+        # 压缩收益不足时不保留副本
+        if len(compressed) < len(data) * 0.9:
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+
+
+async def receive_to_disk(request: Request, directory: str) -> Tuple[str, str, int, bytes]:
+    """把请求体分块写入临时文件，同时计算 SHA-256
+
+    返回 (临时文件路径, 十六进制摘要, 字节数, 文件头)。超出大小上限时返回 413。
+    """
+    max_bytes = settings.upload_max_bytes
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="文件过大"
+        )
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="文件过大"
+                    )
+                if len(head) < 16:
+                    head += chunk[:16 - len(head)]
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    if size == 0:
+        os.unlink(tmp_path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传内容为空")
+    return tmp_path, digest.hexdigest(), size, head
+
+
+def _variant_urls(rendered: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "width": rendered["width"],
+        "height": rendered["height"],
+        "variants": [
+            {
+                "format": variant["format"],
+                "width": variant["width"],
+                "height": variant["height"],
+                "url": f"{URL_PREFIX}/{variant['file']}",
+            }
+            for variant in rendered["variants"]
+        ],
+        "thumbnail": f"{URL_PREFIX}/{rendered['thumbnail']}" if rendered["thumbnail"] else None,
+    }
+
+
+async def store_upload(request: Request, filename: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+    """接收上传并按内容哈希存储，图片额外生成派生图
+
+    返回 (上传记录, 是否为新文件)；相同内容的重复上传直接复用已有记录。
+    """
+    directory = settings.upload_dir
+    os.makedirs(directory, exist_ok=True)
+    tmp_path, sha256, size, head = await receive_to_disk(request, directory)
+
+    sniffed = sniff_image(head)
+    if sniffed:
+        ext, content_type = sniffed
+    else:
+        ext = os.path.splitext(filename or "")[1].lower()
+        if ext not in MEDIA_TYPES:
+            os.unlink(tmp_path)
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="不支持的文件类型"
+            )
+        content_type = MEDIA_TYPES[ext]
+
+    db = get_database()
+    stem = sha256[:STEM_LENGTH]
+    path = os.path.join(directory, f"{stem}{ext}")
+
+    existing = await db.uploads.find_one({"_id": stem})
+    if existing is not None and os.path.exists(path):
+        os.unlink(tmp_path)
+        return existing, False
+
+    os.replace(tmp_path, path)
+    record = {
+        "_id": stem,
+        "sha256": sha256,
+        "url": f"{URL_PREFIX}/{stem}{ext}",
+        "content_type": content_type,
+        "size": size,
+        "created_at": datetime.now(),
+    }
+
+    loop = asyncio.get_running_loop()
+    if content_type in COMPRESSIBLE_TYPES:
+        await loop.run_in_executor(None, write_sidecars, path)
+
+    if sniffed and images.available():
+        try:
+            rendered = await loop.run_in_executor(
+                _image_pool(), images.render_variants, path, directory, stem, VARIANT_WIDTHS
+            )
+            record.update(_variant_urls(rendered))
+        except Exception as e:
+            print(f"⚠️  派生图生成失败（{stem}{ext}）：{e}")
+
+    await db.uploads.replace_one({"_id": stem}, record, upsert=True)
+    return record, True
+
+
+def cover_variants(record: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """从上传记录中提取写入文章的封面派生图集合"""
+    if not record or not record.get("variants"):
+        return None
+    return {
+        "width": record["width"],
+        "height": record["height"],
+        "thumbnail": record["thumbnail"],
+        "sources": record["variants"],
+    }
+
+
+async def cover_variants_for(cover: str) -> Optional[Dict[str, Any]]:
+    """封面是本站上传的文件时，查出其派生图集合"""
+    if not cover or not cover.startswith(f"{URL_PREFIX}/"):
+        return None
+    stem = os.path.splitext(os.path.basename(cover))[0]
+    return cover_variants(await get_database().uploads.find_one({"_id": stem}))
@@ -0,0 +1,108 @@
+import asyncio
+import math
+import time
+from typing import Any, Dict
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from .config import settings
+
+# 热度计算的时间原点（2024-01-01 UTC）
+HOT_EPOCH = 1704067200
+
+
+def hot_log_weight(now: float, count: int = 1) -> float:
+    """count 次浏览在 now 时刻计入的热度（以 2 为底的对数）
+
+    权重随时间按半衰期指数增长，等价于让所有旧浏览按半衰期衰减，
+    因此累加的热度无需定期重算即可按时间衰减排序。权重本身几年后就会超出
+    浮点数范围，所以 hot_score 保存的是权重之和的 log2，按对数相加合并。
+    """
+    half_life = settings.hot_half_life_hours * 3600
+    return math.log2(count) + (now - HOT_EPOCH) / half_life
+
+
+def add_hot_score(score: float, log_weight: float) -> float:
+    """log2(2^score + 2^log_weight)，与 hot_score_update 的数据库表达式一致"""
+    high, low = max(score, log_weight), min(score, log_weight)
+    return high + math.log2(1 + math.pow(2.0, low - high))
+
+
+def hot_score_update(log_weight: float) -> Dict[str, Any]:
+    """把一次加权累加写进 hot_score 的聚合表达式（用于 pipeline 更新）
+
+    尚无热度的文章直接取 log_weight；否则按 max + log2(1 + 2^(min - max))
+    计算，指数部分不大于 0，不会溢出。
+    """
+    high = {"$max": ["$hot_score", log_weight]}
+    low = {"$min": ["$hot_score", log_weight]}
+    merged = {"$add": [
+        high,
+        {"$log": [{"$add": [1, {"$pow": [2, {"$subtract": [low, high]}]}]}, 2]},
+    ]}
+    return {"$cond": [{"$gt": ["$hot_score", 0]}, merged, log_weight]}
+
+
+class ViewCounter:
+    """浏览计数器：在内存中累积，定期批量写入 MongoDB
+
+    每次刷新用一次 bulk_write 对每篇文章执行一次 pipeline 更新（累加 views、
+    合并 hot_score），写入失败的计数会合并回待写队列，下次重试。
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, int] = {}
+        self.flushes = 0
+        self.flushed_views = 0
+        self.failures = 0
+        self._lock = asyncio.Lock()
+
+    def record(self, blog_id: str) -> None:
+        if not ObjectId.is_valid(blog_id):
+            return
+        self.pending[blog_id] = self.pending.get(blog_id, 0) + 1
+
+    async def flush(self, db) -> int:
+        """写入累积的计数，返回写入的浏览次数"""
+        async with self._lock:
+            if not self.pending:
+                return 0
+            batch, self.pending = self.pending, {}
+            try:
+                now = time.time()
+                await db.blogs.bulk_write(
+                    [
+                        UpdateOne(
+                            {"_id": ObjectId(blog_id)},
+                            [{"$set": {
+                                "views": {"$add": [{"$ifNull": ["$views", 0]}, count]},
+                                "hot_score": hot_score_update(hot_log_weight(now, count)),
+                            }}]
+                        )
+                        for blog_id, count in batch.items()
+                    ],
+                    ordered=False
+                )
+            except BaseException:
+                # 包括关闭时被取消的情况，计数留待下次写入
+                for blog_id, count in batch.items():
+                    self.pending[blog_id] = self.pending.get(blog_id, 0) + count
+                self.failures += 1
+                raise
+            total = sum(batch.values())
+            self.flushes += 1
+            self.flushed_views += total
+            return total
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending_posts": len(self.pending),
+            "pending_views": sum(self.pending.values()),
+            "flushes": self.flushes,
+            "flushed_views": self.flushed_views,
+            "failures": self.failures,
+        }
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,19 @@
+from uvicorn.workers import UvicornWorker
+
+from .config import settings
+
+
+class ProductionWorker(UvicornWorker):
+    """生产环境的 gunicorn worker
+
+    固定使用 uvloop 事件循环和 httptools 解析器（uvicorn[standard] 已包含）。
+    keep-alive、backlog 与 max_requests 由 gunicorn 配置传入；
+    收到 SIGTERM 后停止接受新连接，最多等待 graceful_timeout_seconds 让进行中的请求完成。
+    """
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "timeout_graceful_shutdown": settings.graceful_timeout_seconds,
+        "proxy_headers": True,
+    }
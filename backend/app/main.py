@@ -1,18 +1,36 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from datetime import datetime
+import asyncio
 import os
 
 from .core.config import settings
-from .core.database import connect_to_mongo, close_mongo_connection
-from .routers import auth, blog, service, event, settings as settings_router
+from .core.cache import response_cache
+from .core.compression import CompressionMiddleware
+from .core.content import RENDER_VERSION, rebuild_stale_content
+from .core.content_sync import BLOGS, VIEWS, content_sync
+from .core.database import connect_to_mongo, close_mongo_connection, get_database, pool_stats
+from .core.event_schedule import event_scheduler, utc_now
+from .core.feeds import feed_store
+from .core.indexes import ensure_indexes, verify_index_usage
+from .core.metrics import MetricsMiddleware, metrics, monitoring_allowed
+from .core.related import related_index
+from .core.search import INDEX_PROJECTION, search_index
+from .core.security import password_pool, token_cache
+from .core.settings_store import settings_store
+from .core.taxonomy import taxonomy
+from .core.static import UploadFiles
+from .core.uploads import URL_PREFIX, shutdown_image_pool
+from .core.views import view_counter
+from .routers import admin, auth, blog, service, event, feeds, home, upload, settings as settings_router
 
 # 创建 FastAPI 应用
 app = FastAPI(
     title="SNC Blog API",
     description="Backend API for SNC Blog",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS 配置
@@ -22,8 +40,86 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Server-Timing"],
 )
 
+# 响应压缩（缓存条目自行压缩并复用结果，这里只处理其余的动态响应）
+app.add_middleware(CompressionMiddleware)
+
+# 请求耗时与 MongoDB 命令统计（最外层，覆盖 CORS 在内的全部处理时间）
+app.add_middleware(MetricsMiddleware)
+
+
+def _component_gauges():
+    """缓存、连接池、密码线程池和令牌缓存的即时状态"""
+    gauges = {}
+    for prefix, stats in (
+        ("response_cache", response_cache.stats()),
+        ("password_pool", password_pool.stats()),
+        ("token_cache", token_cache.stats()),
+        ("mongo_pool", pool_stats.stats()),
+        ("view_counter", view_counter.stats()),
+        ("settings_store", settings_store.stats()),
+        ("event_scheduler", event_scheduler.stats()),
+        ("content_sync", content_sync.stats()),
+    ):
+        for name, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                gauges[f"{prefix}_{name}"] = value
+    return gauges
+
+
+metrics.register_gauges(_component_gauges)
+
+
+# 后台任务（关闭时取消）
+background_tasks = set()
+
+
+async def rebuild_content():
+    """重新渲染旧版本渲染器生成的文章正文"""
+    db = get_database()
+    try:
+        ids = await rebuild_stale_content(db)
+        if ids:
+            # 自动摘要可能改变，刷新搜索索引、相关文章与订阅
+            async for doc in db.blogs.find({"_id": {"$in": ids}}, INDEX_PROJECTION):
+                search_index.upsert(doc)
+            await related_index.rebuild(db)
+            feed_store.mark_dirty()
+    except Exception as e:
+        print(f"❌ 正文重新渲染失败：{e}")
+        return
+    if ids:
+        response_cache.clear()
+        # 其他 worker 的索引和缓存整体刷新
+        await content_sync.publish(db, BLOGS)
+        print(f"📝 已按渲染版本 {RENDER_VERSION} 重新渲染 {len(ids)} 篇文章")
+
+
+async def flush_views():
+    """写入累积的浏览计数，热门列表随之失效"""
+    try:
+        count = await view_counter.flush(get_database())
+    except Exception as e:
+        print(f"⚠️  浏览计数写入失败（稍后重试）：{e}")
+        return
+    if count:
+        response_cache.invalidate("blogs:popular")
+        await content_sync.publish(get_database(), VIEWS)
+
+
+async def flush_views_periodically():
+    while True:
+        await asyncio.sleep(settings.view_flush_interval_seconds)
+        await flush_views()
+
+
+def start_background_task(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
 
 # 启动事件
 @app.on_event("startup")
@@ -31,8 +127,61 @@ async def startup_event():
     """应用启动时执行"""
     await connect_to_mongo()
     
+    # 对齐索引
+    if settings.mongo_ensure_indexes:
+        report = await ensure_indexes(get_database())
+        for name in report["created"]:
+            print(f"📇 已创建索引 {name}")
+        for message in report["drift"]:
+            print(f"⚠️  索引漂移：{message}")
+        for message in report["failed"]:
+            print(f"❌ 索引创建失败：{message}")
+    if settings.mongo_explain_check:
+        for message in await verify_index_usage(get_database()):
+            print(f"⚠️  查询未命中索引：{message}")
+    
+    # 构建快照之前的时间点，内容同步从这里开始补上其他 worker 的修改
+    synced_since = utc_now()
+    
+    # 构建全文搜索索引
+    await search_index.rebuild(get_database())
+    print(f"🔎 搜索索引已构建（{len(search_index.docs)} 篇文章）")
+    
+    # 构建分类、标签与归档统计
+    await taxonomy.rebuild(get_database())
+    print(f"🏷️  分类统计已构建（{len(taxonomy.categories)} 个分类，{len(taxonomy.tags)} 个标签）")
+    
+    # 预计算相关文章
+    await related_index.rebuild(get_database())
+    print(f"🔗 相关文章已计算（{len(related_index.ids)} 篇文章，词表 {len(related_index.vocab)} 个词）")
+    
+    # 加载设置快照，之后的读取不再访问数据库
+    await settings_store.reload(get_database())
+    print(f"⚙️  设置已加载（{len(settings_store.snapshot.values)} 项）")
+    if settings.site_settings_watch:
+        start_background_task(settings_store.watch(get_database()))
+    
+    # 加载令牌撤销记录，之后同步其他 worker 的退出登录
+    revoked = await token_cache.load_revocations(get_database())
+    print(f"🔒 令牌撤销记录已加载（{revoked} 条）")
+    if settings.token_revocation_watch:
+        start_background_task(token_cache.watch_revocations(get_database()))
+    
+    # 同步其他 worker 对文章、活动和服务的修改
+    if settings.content_sync_watch:
+        start_background_task(content_sync.watch(get_database(), synced_since))
+    
+    # 后台重新渲染正文（不阻塞启动）
+    start_background_task(rebuild_content())
+    
+    # 按活动时间维护 upcoming / ongoing / past 状态
+    start_background_task(event_scheduler.run(get_database()))
+    
+    # 定期批量写入浏览计数
+    start_background_task(flush_views_periodically())
+    
     # 创建uploads目录（如果不存在）
-    uploads_dir = "uploads"
+    uploads_dir = settings.upload_dir
     if not os.path.exists(uploads_dir):
         os.makedirs(uploads_dir)
     
@@ -43,12 +192,20 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭时执行"""
+    tasks = list(background_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    # 关闭连接前写入剩余的浏览计数
+    await flush_views()
     await close_mongo_connection()
+    password_pool.shutdown()
+    shutdown_image_pool()
 
 
 # 静态文件服务
-if os.path.exists("uploads"):
-    app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+if os.path.exists(settings.upload_dir):
+    app.mount(URL_PREFIX, UploadFiles(directory=settings.upload_dir), name="uploads")
 
 
 # 注册路由
@@ -57,18 +214,54 @@ app.include_router(blog.router, prefix="/api/blogs", tags=["博客"])
 app.include_router(service.router, prefix="/api/services", tags=["服务"])
 app.include_router(event.router, prefix="/api/events", tags=["活动"])
 app.include_router(settings_router.router, prefix="/api/settings", tags=["设置"])
+app.include_router(upload.router, prefix="/api/uploads", tags=["上传"])
+app.include_router(home.router, prefix="/api/home", tags=["首页"])
+app.include_router(admin.router, prefix="/api/admin", tags=["管理"])
+app.include_router(feeds.router, tags=["订阅与站点地图"])
+
 
+def require_monitoring_access(request: Request) -> None:
+    """监控接口只对 MONITORING_ALLOW_IPS 中的地址或携带 MONITORING_TOKEN 的请求开放"""
+    if not monitoring_allowed(request.scope, request.headers.get("authorization")):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权访问监控接口"
+        )
 
-# 健康检查
+
+# 健康检查（存活探测，不暴露内部状态）
 @app.get("/api/health", tags=["健康检查"])
 async def health_check():
     """健康检查接口"""
+    return {"status": "ok", "timestamp": datetime.now().isoformat()}
+
+
+@app.get("/api/health/details", tags=["健康检查"], dependencies=[Depends(require_monitoring_access)])
+async def health_details():
+    """缓存、连接池、线程池等组件状态（受访问控制）"""
     return {
         "status": "ok",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "cache": response_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "token_cache": token_cache.stats(),
+        "mongo_pool": pool_stats.stats(),
+        "view_counter": view_counter.stats(),
+        "settings_store": settings_store.stats(),
+        "content_sync": content_sync.stats()
     }
 
 
+# 指标导出
+@app.get(
+    "/api/metrics", response_class=PlainTextResponse, tags=["健康检查"],
+    dependencies=[Depends(require_monitoring_access)]
+)
+async def metrics_endpoint():
+    """Prometheus 文本格式的指标"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # 根路由
 @app.get("/", tags=["根路由"])
 async def root():
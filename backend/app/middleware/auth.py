@@ -1,8 +1,11 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from ..core.security import verify_token
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
@@ -17,3 +20,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         )
     
     return payload
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[dict]:
+    """公开接口中识别管理员（未携带或无效的令牌视为匿名访问）"""
+    if credentials is None:
+        return None
+    return verify_token(credentials.credentials)
@@ -0,0 +1,124 @@
+import asyncio
+from fastapi import APIRouter, Depends, Request
+from typing import Any, Dict, List
+from ..core.cache import response_cache
+from ..core.config import settings
+from ..core.database import get_database
+from ..core.serialization import dumps
+from ..core.views import view_counter
+from ..middleware.auth import get_current_user
+
+router = APIRouter()
+
+# 最近动态中每类内容的条数
+RECENT_COUNT = 5
+
+_BLOG_PIPELINE = [
+    {"$facet": {
+        "status": [{"$group": {
+            "_id": "$published",
+            "count": {"$sum": 1},
+            "views": {"$sum": {"$ifNull": ["$views", 0]}},
+            "words": {"$sum": {"$ifNull": ["$word_count", 0]}},
+        }}],
+        "categories": [
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ],
+    }},
+]
+
+_EVENT_PIPELINE = [
+    {"$facet": {
+        "published": [{"$group": {"_id": "$published", "count": {"$sum": 1}}}],
+        "status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+        "categories": [
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ],
+    }},
+]
+
+_SERVICE_PIPELINE = [
+    {"$facet": {
+        "active": [{"$group": {"_id": "$active", "count": {"$sum": 1}}}],
+        "categories": [
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ],
+    }},
+]
+
+
+async def _facet(collection, pipeline: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    rows = await collection.aggregate(pipeline).to_list(1)
+    return rows[0] if rows else {}
+
+
+def _flag_counts(groups: List[Dict[str, Any]], yes: str, no: str) -> Dict[str, int]:
+    """按布尔字段分组的计数（缺省字段视为 True，与各模型的默认值一致）"""
+    counts = {yes: 0, no: 0}
+    for group in groups:
+        counts[no if group["_id"] is False else yes] += group["count"]
+    counts["total"] = counts[yes] + counts[no]
+    return counts
+
+
+def _named_counts(groups: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{"name": group["_id"] or "", "count": group["count"]} for group in groups]
+
+
+async def _recent(collection, projection: Dict[str, int], sort_field: str) -> List[Dict[str, Any]]:
+    return await collection.find({}, projection).sort(sort_field, -1).limit(RECENT_COUNT).to_list(RECENT_COUNT)
+
+
+async def collect_stats(db) -> Dict[str, Any]:
+    """并发执行各集合的聚合与最近动态查询"""
+    blogs, events, services, recent_blogs, recent_events = await asyncio.gather(
+        _facet(db.blogs, _BLOG_PIPELINE),
+        _facet(db.events, _EVENT_PIPELINE),
+        _facet(db.services, _SERVICE_PIPELINE),
+        _recent(db.blogs, {"title": 1, "published": 1, "updated_at": 1}, "updated_at"),
+        _recent(db.events, {"title": 1, "status": 1, "date": 1, "created_at": 1}, "created_at"),
+    )
+
+    blog_status = blogs.get("status", [])
+    # 已写入数据库的浏览量加上尚未批量写入的部分
+    views = sum(group["views"] for group in blog_status) + view_counter.stats()["pending_views"]
+
+    return {
+        "blogs": {
+            **_flag_counts(blog_status, "published", "drafts"),
+            "words": sum(group["words"] for group in blog_status),
+            "categories": _named_counts(blogs.get("categories", [])),
+        },
+        "events": {
+            **_flag_counts(events.get("published", []), "published", "drafts"),
+            "status": {group["_id"] or "": group["count"] for group in events.get("status", [])},
+            "categories": _named_counts(events.get("categories", [])),
+        },
+        "services": {
+            **_flag_counts(services.get("active", []), "active", "inactive"),
+            "categories": _named_counts(services.get("categories", [])),
+        },
+        "views": views,
+        "recent": {"blogs": recent_blogs, "events": recent_events},
+    }
+
+
+@router.get("/stats", response_model=dict)
+async def get_stats(request: Request, current_user: dict = Depends(get_current_user)):
+    """仪表盘统计（需要管理员权限）
+
+    计数、分类分布、总浏览量和最近动态由聚合查询并发算出，结果短时间缓存。
+    """
+    entry = response_cache.get("admin:stats")
+    if entry is not None:
+        return entry.to_response(request)
+
+    stats = await collect_stats(get_database())
+
+    entry = response_cache.set(
+        "admin:stats", dumps(stats), ttl=settings.admin_stats_ttl_seconds
+    )
+    return entry.to_response(request)
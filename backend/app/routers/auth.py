@@ -1,15 +1,28 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from bson import ObjectId
 from typing import List
 from ..schemas import (
     AdminCreate, AdminLogin, TokenResponse, AdminResponse, MessageResponse
 )
 from ..core.database import get_database
-from ..core.security import get_password_hash, verify_password, create_access_token
+from ..core.security import (
+    PasswordPoolBusy, create_access_token, get_password_hash_async, token_cache,
+    verify_password_async
+)
+from ..middleware.auth import get_current_user, security
 
 router = APIRouter()
 
 
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="服务器繁忙，请稍后重试",
+        headers={"Retry-After": "1"}
+    )
+
+
 @router.get("/check-setup", response_model=dict)
 async def check_setup():
     """检查是否已有管理员账号"""
@@ -31,11 +44,16 @@ async def setup_admin(admin: AdminCreate):
             detail="管理员账号已存在"
         )
     
+    try:
+        hashed_password = await get_password_hash_async(admin.password)
+    except PasswordPoolBusy:
+        raise _busy()
+    
     # 创建管理员
     admin_dict = {
         "username": admin.username,
         "email": admin.email,
-        "hashed_password": get_password_hash(admin.password),
+        "hashed_password": hashed_password,
         "is_first_login": False,
         "created_at": None
     }
@@ -66,7 +84,12 @@ async def login(credentials: AdminLogin):
         )
     
     # 验证密码
-    if not verify_password(credentials.password, admin["hashed_password"]):
+    try:
+        password_ok = await verify_password_async(credentials.password, admin["hashed_password"])
+    except PasswordPoolBusy:
+        raise _busy()
+    
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误"
@@ -80,3 +103,13 @@ async def login(credentials: AdminLogin):
         token=token,
         admin=AdminResponse(id=str(admin["_id"]), username=admin["username"], email=admin["email"])
     )
+
+
+@router.post("/logout", response_model=MessageResponse)
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(get_current_user)
+):
+    """退出登录（撤销当前令牌）"""
+    await token_cache.revoke(get_database(), credentials.credentials, current_user)
+    return MessageResponse(message="已退出登录")
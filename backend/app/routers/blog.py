@@ -1,24 +1,56 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
 from bson import ObjectId
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 from datetime import datetime
 from ..schemas import (
-    BlogCreate, BlogUpdate, BlogResponse, MessageResponse
+    BlogCreate, BlogUpdate, BlogListItem, BlogResponse, BlogSummary, MessageResponse
 )
+from ..core.cache import document_timestamp, make_cache_key, response_cache
+from ..core.content import content_fields
+from ..core.content_sync import BLOGS, content_sync
 from ..core.database import get_database
-from ..middleware.auth import get_current_user
+from ..core.feeds import feed_store
+from ..core.repository import blog_repo
+from ..core.pagination import (
+    InvalidCursor, decode_cursor, encode_cursor, encode_keyset_cursor, keyset_filter
+)
+from ..core.related import related_index
+from ..core.search import search_index, highlight
+from ..core.uploads import cover_variants_for
+from ..core.views import view_counter
+from ..core.taxonomy import taxonomy
+from ..core.serialization import projection_for, render_document, render_documents
+from ..middleware.auth import get_current_user, get_optional_user
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[BlogResponse])
+BLOG_LIST_MODEL = List[Union[BlogListItem, BlogSummary]]
+
+
+@router.get("/", response_model=BLOG_LIST_MODEL)
 async def get_blogs(
+    request: Request,
     category: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
-    published: Optional[str] = Query("true")
+    published: Optional[str] = Query("true"),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    view: str = Query("full", pattern="^(full|list)$")
 ):
-    """获取所有文章（公开接口）"""
-    db = get_database()
+    """获取所有文章（公开接口）
+
+    传入 limit 时按 (date, _id) 键集分页，下一页游标通过响应头 X-Next-Cursor 返回；
+    view=list 时不返回正文 content；search 走全文索引，按相关度排序。
+    """
+    cache_key = make_cache_key(
+        "blogs:list", category=category, search=search, published=published,
+        limit=limit, cursor=cursor, view=view
+    )
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        return entry.to_response(request)
+    
     query = {}
     
     # 只显示已发布的文章
@@ -28,58 +60,229 @@ async def get_blogs(
     if category and category != "全部":
         query["category"] = category
     
-    if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"excerpt": {"$regex": search, "$options": "i"}},
-            {"content": {"$regex": search, "$options": "i"}},
-            {"tags": {"$regex": search, "$options": "i"}}
-        ]
+    # 列表模式下不返回正文；渲染后的 HTML 与目录只在详情中返回
+    model = BlogSummary if view == "list" else BlogListItem
+    projection = projection_for(model)
     
-    blogs = await db.blogs.find(query).sort("date", -1).to_list(None)
-    
-    # 转换_id为字符串
-    for blog in blogs:
-        blog["_id"] = str(blog["_id"])
+    if search:
+        blogs, next_cursor = await _search_blogs(
+            search, published == "true", query.get("category"),
+            limit, cursor, projection
+        )
+    else:
+        blogs, next_cursor = await _list_blogs(query, limit, cursor, projection)
     
-    return blogs
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    entry = response_cache.set(
+        cache_key, render_documents(blogs, model),
+        tags=("blogs:list",), headers=headers
+    )
+    return entry.to_response(request)
 
 
-@router.get("/{blog_id}", response_model=BlogResponse)
-async def get_blog(blog_id: str):
-    """获取单篇文章（公开接口）"""
+async def _list_blogs(
+    query: dict,
+    limit: Optional[int],
+    cursor: Optional[str],
+    projection: dict
+) -> Tuple[List[dict], Optional[str]]:
+    """按 (date, _id) 倒序查询文章，返回一页结果和下一页游标"""
     db = get_database()
     
-    if not ObjectId.is_valid(blog_id):
+    try:
+        after = keyset_filter(cursor)
+    except InvalidCursor:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="无效的文章ID"
+            detail="无效的分页游标"
         )
+    if after:
+        query = {"$and": [query, after]} if query else after
     
-    blog = await db.blogs.find_one({"_id": ObjectId(blog_id)})
+    find = db.blogs.find(query, projection).sort([("date", -1), ("_id", -1)])
     
-    if not blog:
+    next_cursor = None
+    if limit:
+        # 多取一条用于判断是否还有下一页
+        blogs = await find.limit(limit + 1).to_list(limit + 1)
+        if len(blogs) > limit:
+            blogs = blogs[:limit]
+            next_cursor = encode_keyset_cursor(blogs[-1])
+    else:
+        blogs = await find.to_list(None)
+    
+    return blogs, next_cursor
+
+
+async def _search_blogs(
+    search: str,
+    published_only: bool,
+    category: Optional[str],
+    limit: Optional[int],
+    cursor: Optional[str],
+    projection: dict
+) -> Tuple[List[dict], Optional[str]]:
+    """通过全文索引搜索文章，按相关度排序并附带高亮"""
+    db = get_database()
+    hits = search_index.search(search, published_only=published_only, category=category)
+    
+    # 相关度排序无法使用键集游标，这里游标记录的是偏移量
+    try:
+        offset = int(decode_cursor(cursor).get("o", 0)) if cursor else 0
+    except (InvalidCursor, TypeError, ValueError):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="文章不存在"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的分页游标"
         )
     
-    blog["_id"] = str(blog["_id"])
-    return blog
+    end = offset + limit if limit else len(hits)
+    page = hits[offset:end]
+    next_cursor = encode_cursor({"o": end}) if end < len(hits) else None
+    
+    if not page:
+        return [], next_cursor
+    
+    docs = await db.blogs.find(
+        {"_id": {"$in": [ObjectId(hit.id) for hit in page]}}, projection
+    ).to_list(None)
+    by_id = {str(doc["_id"]): doc for doc in docs}
+    
+    blogs = []
+    for hit in page:
+        blog = by_id.get(hit.id)
+        if blog is None:
+            continue
+        blog["_id"] = hit.id
+        blog["highlight"] = highlight(blog, search)
+        blogs.append(blog)
+    
+    return blogs, next_cursor
+
+
+@router.get("/popular", response_model=List[BlogSummary])
+async def get_popular_blogs(request: Request, limit: int = Query(10, ge=1, le=50)):
+    """热门文章（按时间衰减的浏览热度排序，公开接口）
+
+    热度在浏览计数批量写入时累加，这里只是沿 hot_score 索引取前 N 篇。
+    """
+    cache_key = make_cache_key("blogs:popular", limit=limit)
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        return entry.to_response(request)
+    
+    db = get_database()
+    blogs = await db.blogs.find(
+        {"published": True, "hot_score": {"$gt": 0}}, projection_for(BlogSummary)
+    ).sort("hot_score", -1).limit(limit).to_list(limit)
+    
+    entry = response_cache.set(
+        cache_key, render_documents(blogs, BlogSummary), tags=("blogs:popular",)
+    )
+    return entry.to_response(request)
+
+
+@router.get("/categories", response_model=List[dict])
+async def get_categories():
+    """各分类的已发布文章数（公开接口）"""
+    return taxonomy.category_counts()
+
+
+@router.get("/tags", response_model=List[dict])
+async def get_tags(limit: Optional[int] = Query(None, ge=1, le=500)):
+    """标签云：按文章数倒序（公开接口）"""
+    return taxonomy.tag_counts(limit)
+
+
+@router.get("/archive", response_model=List[dict])
+async def get_archive():
+    """按月归档的文章数，月份倒序（公开接口）"""
+    return taxonomy.archive_counts()
+
+
+@router.get("/{blog_id}/related", response_model=List[BlogSummary])
+async def get_related_blogs(blog_id: str, request: Request):
+    """相关文章（按标签重合度与正文相似度预先计算，公开接口）"""
+    cache_key = make_cache_key(f"blogs:{blog_id}:related")
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        return entry.to_response(request)
+    
+    # 不在索引中的文章（草稿、刚被其他 worker 发布或不存在）先确认存在，不为未知 ID 写缓存
+    if blog_id not in related_index.rows:
+        await blog_repo.get(blog_id, {"_id": 1})
+    
+    ids = [ObjectId(related_id) for related_id, _ in related_index.related(blog_id)]
+    blogs = []
+    if ids:
+        docs = await get_database().blogs.find(
+            {"_id": {"$in": ids}}, projection_for(BlogSummary)
+        ).to_list(None)
+        by_id = {doc["_id"]: doc for doc in docs}
+        blogs = [by_id[related_id] for related_id in ids if related_id in by_id]
+    
+    entry = response_cache.set(
+        cache_key, render_documents(blogs, BlogSummary),
+        tags=("blogs:related", f"blogs:{blog_id}")
+    )
+    return entry.to_response(request)
+
+
+def _record_view(blog_id: str, current_user: Optional[dict]) -> None:
+    """只为已发布的文章计数；管理员（如编辑器加载文章）的访问不计入"""
+    indexed = search_index.docs.get(blog_id)
+    if current_user is None and indexed is not None and indexed.published:
+        view_counter.record(blog_id)
+
+
+@router.get("/{blog_id}", response_model=BlogResponse)
+async def get_blog(
+    blog_id: str,
+    request: Request,
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """获取单篇文章（公开接口）
+
+    发布状态取自搜索索引，缓存命中时也无需查询数据库；不存在的文章由 get 直接返回 404。
+    """
+    cache_key = make_cache_key(f"blogs:{blog_id}")
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        _record_view(blog_id, current_user)
+        return entry.to_response(request)
+    
+    blog = await blog_repo.get(blog_id, projection_for(BlogResponse))
+    _record_view(blog_id, current_user)
+    
+    entry = response_cache.set(
+        cache_key, render_document(blog, BlogResponse),
+        tags=(f"blogs:{blog_id}",), last_modified=document_timestamp(blog)
+    )
+    return entry.to_response(request)
 
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_blog(blog: BlogCreate, current_user: dict = Depends(get_current_user)):
     """创建文章（需要管理员权限）"""
-    db = get_database()
-    
     blog_dict = blog.model_dump()
     blog_dict["created_at"] = datetime.now()
     blog_dict["updated_at"] = datetime.now()
+    blog_dict["cover_variants"] = await cover_variants_for(blog_dict["cover"])
+    # 预渲染正文；未显式传入 read_time 时自动估算
+    blog_dict.update(content_fields(
+        blog.content,
+        excerpt=blog.excerpt,
+        read_time=blog.read_time if "read_time" in blog.model_fields_set else None
+    ))
     
-    result = await db.blogs.insert_one(blog_dict)
-    
-    blog_dict["_id"] = str(result.inserted_id)
+    blog_dict = await blog_repo.insert(blog_dict)
+    search_index.upsert(blog_dict)
+    taxonomy.upsert(blog_dict)
+    await related_index.upsert(blog_dict)
+    # 草稿不影响订阅和站点地图
+    if blog_dict["published"]:
+        feed_store.mark_dirty()
+    response_cache.invalidate("blogs:list", "blogs:related")
+    await content_sync.publish(get_database(), BLOGS, str(blog_dict["_id"]))
     
     return {"message": "文章创建成功", "blog": blog_dict}
 
@@ -91,31 +294,36 @@ async def update_blog(
     current_user: dict = Depends(get_current_user)
 ):
     """更新文章（需要管理员权限）"""
-    db = get_database()
-    
-    if not ObjectId.is_valid(blog_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="无效的文章ID"
-        )
-    
+    stored = await blog_repo.get(blog_id, {"content": 1, "read_time": 1, "read_time_manual": 1})
     # 只更新提供的字段
     update_data = {k: v for k, v in blog_update.model_dump().items() if v is not None}
     update_data["updated_at"] = datetime.now()
+    # 更换封面时同步派生图集合
+    if "cover" in update_data:
+        update_data["cover_variants"] = await cover_variants_for(update_data["cover"])
+    # 原样提交的阅读时长不算手工填写，只有改动过的才覆盖自动估算；空字符串恢复自动估算
+    was_manual = stored.get("read_time") if stored.get("read_time_manual") else None
+    read_time = was_manual
+    if "read_time" in blog_update.model_fields_set and blog_update.read_time != stored.get("read_time"):
+        read_time = blog_update.read_time or None
+    update_data.pop("read_time", None)
+    # 正文或阅读时长来源变化时重新渲染
+    if "content" in update_data or read_time != was_manual:
+        update_data.update(content_fields(
+            update_data.get("content", stored.get("content", "")),
+            excerpt=update_data.get("excerpt"),
+            read_time=read_time
+        ))
     
-    result = await db.blogs.update_one(
-        {"_id": ObjectId(blog_id)},
-        {"$set": update_data}
-    )
-    
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="文章不存在"
-        )
-    
-    updated_blog = await db.blogs.find_one({"_id": ObjectId(blog_id)})
-    updated_blog["_id"] = str(updated_blog["_id"])
+    updated_blog = await blog_repo.update(blog_id, update_data)
+    previous = search_index.docs.get(blog_id)
+    if updated_blog.get("published", True) or (previous and previous.published):
+        feed_store.mark_dirty()
+    search_index.upsert(updated_blog)
+    taxonomy.upsert(updated_blog)
+    await related_index.upsert(updated_blog)
+    response_cache.invalidate("blogs:list", "blogs:popular", "blogs:related", f"blogs:{blog_id}")
+    await content_sync.publish(get_database(), BLOGS, blog_id)
     
     return {"message": "文章更新成功", "blog": updated_blog}
 
@@ -123,20 +331,14 @@ async def update_blog(
 @router.delete("/{blog_id}", response_model=MessageResponse)
 async def delete_blog(blog_id: str, current_user: dict = Depends(get_current_user)):
     """删除文章（需要管理员权限）"""
-    db = get_database()
+    deleted = await blog_repo.delete(blog_id, {"_id": 1, "published": 1})
     
-    if not ObjectId.is_valid(blog_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="无效的文章ID"
-        )
-    
-    result = await db.blogs.delete_one({"_id": ObjectId(blog_id)})
-    
-    if result.deleted_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="文章不存在"
-        )
+    search_index.remove(blog_id)
+    taxonomy.remove(blog_id)
+    await related_index.remove(blog_id)
+    if deleted.get("published", True):
+        feed_store.mark_dirty()
+    response_cache.invalidate("blogs:list", "blogs:popular", "blogs:related", f"blogs:{blog_id}")
+    await content_sync.publish(get_database(), BLOGS, blog_id)
     
     return MessageResponse(message="文章删除成功")
@@ -1,23 +1,59 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from bson import ObjectId
-from typing import List, Optional
-from datetime import datetime
+from fastapi import APIRouter, status, Depends, Query, Request
+from typing import List, Optional, Union
+from datetime import date, datetime, time, timedelta
 from ..schemas import (
     EventCreate, EventUpdate, EventResponse, MessageResponse
 )
+from ..core.cache import document_timestamp, make_cache_key, response_cache
+from ..core.content_sync import EVENTS, content_sync
 from ..core.database import get_database
+from ..core.event_schedule import event_scheduler, status_for, utc_now
+from ..core.feeds import SITEMAP, feed_store
+from ..core.repository import event_repo
+from ..core.serialization import projection_for, render_document, render_documents
 from ..middleware.auth import get_current_user
 
 router = APIRouter()
 
 
+def _lower_bound(value: Union[datetime, date]) -> datetime:
+    """from：只给日期时从当天零点开始"""
+    if isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.min)
+
+
+def _upper_bound(value: Union[datetime, date]) -> dict:
+    """to：只给日期时包含当天全天"""
+    if isinstance(value, datetime):
+        return {"$lte": value}
+    return {"$lt": datetime.combine(value + timedelta(days=1), time.min)}
+
+
 @router.get("/", response_model=List[EventResponse])
 async def get_events(
+    request: Request,
     category: Optional[str] = Query(None),
     status_filter: Optional[str] = Query(None, alias="status"),
-    published: Optional[str] = Query("true")
+    published: Optional[str] = Query("true"),
+    date_from: Optional[Union[datetime, date]] = Query(None, alias="from"),
+    date_to: Optional[Union[datetime, date]] = Query(None, alias="to"),
+    upcoming: bool = Query(False),
+    limit: Optional[int] = Query(None, ge=1, le=100)
 ):
-    """获取所有活动（公开接口）"""
+    """获取所有活动（公开接口）
+
+    from / to 按活动日期筛选，可以是日期（to 包含当天）或日期时间；
+    upcoming=true 只返回尚未开始的活动，按日期升序，配合 limit 只读取前 N 条。
+    """
+    cache_key = make_cache_key(
+        "events:list", category=category, status=status_filter, published=published,
+        date_from=date_from, date_to=date_to, upcoming=upcoming or None, limit=limit
+    )
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        return entry.to_response(request)
+    
     db = get_database()
     query = {}
     
@@ -30,48 +66,61 @@ async def get_events(
     if status_filter:
         query["status"] = status_filter
     
-    events = await db.events.find(query).sort("date", -1).to_list(None)
-    
-    for event in events:
-        event["_id"] = str(event["_id"])
-    
-    return events
+    date_range = {}
+    if date_from:
+        date_range["$gte"] = _lower_bound(date_from)
+    if date_to:
+        date_range.update(_upper_bound(date_to))
+    if upcoming:
+        # 与 status_for 一致：开始时间晚于当前时间才算未开始；
+        # 缓存会在活动开始时由状态调度器失效
+        date_range["$gt"] = utc_now()
+    if date_range:
+        query["date"] = date_range
+    
+    find = db.events.find(query, projection_for(EventResponse)).sort("date", 1 if upcoming else -1)
+    if limit:
+        find = find.limit(limit)
+    events = await find.to_list(limit)
+    
+    entry = response_cache.set(
+        cache_key, render_documents(events, EventResponse), tags=("events:list",)
+    )
+    return entry.to_response(request)
 
 
 @router.get("/{event_id}", response_model=EventResponse)
-async def get_event(event_id: str):
+async def get_event(event_id: str, request: Request):
     """获取单个活动（公开接口）"""
-    db = get_database()
-    
-    if not ObjectId.is_valid(event_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="无效的活动ID"
-        )
-    
-    event = await db.events.find_one({"_id": ObjectId(event_id)})
+    cache_key = make_cache_key(f"events:{event_id}")
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        return entry.to_response(request)
     
-    if not event:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="活动不存在"
-        )
+    event = await event_repo.get(event_id, projection_for(EventResponse))
     
-    event["_id"] = str(event["_id"])
-    return event
+    entry = response_cache.set(
+        cache_key, render_document(event, EventResponse),
+        tags=(f"events:{event_id}",), last_modified=document_timestamp(event)
+    )
+    return entry.to_response(request)
 
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_event(event: EventCreate, current_user: dict = Depends(get_current_user)):
     """创建活动（需要管理员权限）"""
-    db = get_database()
-    
     event_dict = event.model_dump()
     event_dict["created_at"] = datetime.now()
+    event_dict["updated_at"] = event_dict["created_at"]
+    # 未显式指定状态时按时间计算
+    if "status" not in event.model_fields_set:
+        event_dict["status"] = status_for(event.date, event.end_date, utc_now())
     
-    result = await db.events.insert_one(event_dict)
-    
-    event_dict["_id"] = str(result.inserted_id)
+    event_dict = await event_repo.insert(event_dict)
+    response_cache.invalidate("events:list")
+    feed_store.mark_dirty(SITEMAP)
+    event_scheduler.wake()
+    await content_sync.publish(get_database(), EVENTS, str(event_dict["_id"]))
     
     return {"message": "活动创建成功", "event": event_dict}
 
@@ -83,29 +132,15 @@ async def update_event(
     current_user: dict = Depends(get_current_user)
 ):
     """更新活动（需要管理员权限）"""
-    db = get_database()
-    
-    if not ObjectId.is_valid(event_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="无效的活动ID"
-        )
-    
     update_data = {k: v for k, v in event_update.model_dump().items() if v is not None}
+    update_data["updated_at"] = datetime.now()
     
-    result = await db.events.update_one(
-        {"_id": ObjectId(event_id)},
-        {"$set": update_data}
-    )
-    
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="活动不存在"
-        )
-    
-    updated_event = await db.events.find_one({"_id": ObjectId(event_id)})
-    updated_event["_id"] = str(updated_event["_id"])
+    updated_event = await event_repo.update(event_id, update_data)
+    response_cache.invalidate("events:list", f"events:{event_id}")
+    feed_store.mark_dirty(SITEMAP)
+    # 时间变化后立即修正状态并重新安排下一次运行
+    event_scheduler.wake()
+    await content_sync.publish(get_database(), EVENTS, event_id)
     
     return {"message": "活动更新成功", "event": updated_event}
 
@@ -113,20 +148,10 @@ async def update_event(
 @router.delete("/{event_id}", response_model=MessageResponse)
 async def delete_event(event_id: str, current_user: dict = Depends(get_current_user)):
     """删除活动（需要管理员权限）"""
-    db = get_database()
-    
-    if not ObjectId.is_valid(event_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="无效的活动ID"
-        )
-    
-    result = await db.events.delete_one({"_id": ObjectId(event_id)})
+    await event_repo.delete(event_id, {"_id": 1})
     
-    if result.deleted_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="活动不存在"
-        )
+    response_cache.invalidate("events:list", f"events:{event_id}")
+    feed_store.mark_dirty(SITEMAP)
+    await content_sync.publish(get_database(), EVENTS, event_id)
     
     return MessageResponse(message="活动删除成功")
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from ..core.database import get_database
+from ..core.feeds import ATOM, MEDIA_TYPES, RSS, SITEMAP, feed_store
+
+router = APIRouter()
+
+
+@router.get("/feed.xml")
+async def rss_feed(request: Request):
+    """RSS 2.0 订阅"""
+    entry = await feed_store.get(RSS, get_database())
+    return entry.to_response(request)
+
+
+@router.get("/atom.xml")
+async def atom_feed(request: Request):
+    """Atom 订阅"""
+    entry = await feed_store.get(ATOM, get_database())
+    return entry.to_response(request)
+
+
+@router.get("/sitemap.xml")
+async def sitemap(request: Request):
+    """站点地图（文章过多时为 sitemap 索引）"""
+    entry = await feed_store.get(SITEMAP, get_database())
+    return entry.to_response(request)
+
+
+@router.get("/sitemap-{part:int}.xml")
+async def sitemap_part(part: int):
+    """sitemap 分片（流式输出）"""
+    db = get_database()
+    # 确保分片边界与最新的索引一致
+    await feed_store.get(SITEMAP, db)
+    if not feed_store.has_sitemap_part(part):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="sitemap 不存在")
+    return StreamingResponse(
+        feed_store.stream_sitemap_part(part, db),
+        media_type=MEDIA_TYPES[SITEMAP],
+        headers={"Cache-Control": "public, max-age=3600"}
+    )
@@ -0,0 +1,76 @@
+import asyncio
+from fastapi import APIRouter, Query, Request
+from datetime import datetime
+from ..schemas import BlogSummary, EventResponse
+from ..core.cache import make_cache_key, response_cache
+from ..core.database import get_database
+from ..core.event_schedule import utc_now
+from ..core.serialization import compile_model, dumps, projection_for
+from ..core.taxonomy import taxonomy
+
+router = APIRouter()
+
+# 首页数据涉及的全部缓存标签，任一内容变更都会使整包失效
+HOME_TAGS = ("blogs:list", "events:list")
+
+
+async def _latest_posts(db, limit: int):
+    if not limit:
+        # limit(0) 在 MongoDB 中表示不限制条数
+        return []
+    return await db.blogs.find(
+        {"published": True}, projection_for(BlogSummary)
+    ).sort([("date", -1), ("_id", -1)]).limit(limit).to_list(limit)
+
+
+async def _events(db, limit: int, now: datetime, upcoming: bool):
+    if not limit:
+        return []
+    # 与 status_for 和 /api/events?upcoming=true 一致：开始时间晚于当前时间才算未开始
+    if upcoming:
+        query, order = {"published": True, "date": {"$gt": now}}, 1
+    else:
+        query, order = {"published": True, "date": {"$lte": now}}, -1
+    return await db.events.find(
+        query, projection_for(EventResponse)
+    ).sort("date", order).limit(limit).to_list(limit)
+
+
+@router.get("", response_model=dict)
+async def get_home(
+    request: Request,
+    posts: int = Query(6, ge=0, le=20),
+    events: int = Query(3, ge=0, le=20)
+):
+    """首页数据（公开接口）
+
+    一次返回最新文章、近期活动和文章统计，各查询并发执行，结果作为一个整体缓存。
+    近期活动优先列出即将举办的，不足时用最近结束的补齐；数量为 0 时不查询。
+    """
+    cache_key = make_cache_key("home", posts=posts, events=events)
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        return entry.to_response(request)
+
+    db = get_database()
+    now = utc_now()
+    latest, upcoming, past = await asyncio.gather(
+        _latest_posts(db, posts),
+        _events(db, events, now, upcoming=True),
+        _events(db, events, now, upcoming=False),
+    )
+
+    blog_model = compile_model(BlogSummary)
+    event_model = compile_model(EventResponse)
+    payload = {
+        "posts": [blog_model.prepare(doc) for doc in latest],
+        "events": [event_model.prepare(doc) for doc in (upcoming + past)[:events]],
+        "stats": {
+            "posts": len(taxonomy.contributions),
+            "categories": len(taxonomy.categories),
+            "tags": len(taxonomy.tags),
+        },
+    }
+
+    entry = response_cache.set(cache_key, dumps(payload), tags=HOME_TAGS)
+    return entry.to_response(request)
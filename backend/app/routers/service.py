@@ -1,11 +1,14 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from bson import ObjectId
+from fastapi import APIRouter, status, Depends, Query, Request
 from typing import List, Optional
 from datetime import datetime
 from ..schemas import (
     ServiceCreate, ServiceUpdate, ServiceResponse, MessageResponse
 )
+from ..core.cache import make_cache_key, response_cache
+from ..core.content_sync import SERVICES, content_sync
 from ..core.database import get_database
+from ..core.repository import service_repo
+from ..core.serialization import projection_for, render_documents
 from ..middleware.auth import get_current_user
 
 router = APIRouter()
@@ -13,10 +16,16 @@ router = APIRouter()
 
 @router.get("/", response_model=List[ServiceResponse])
 async def get_services(
+    request: Request,
     category: Optional[str] = Query(None),
     active: Optional[str] = Query("true")
 ):
     """获取所有服务（公开接口）"""
+    cache_key = make_cache_key("services:list", category=category, active=active)
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        return entry.to_response(request)
+    
     db = get_database()
     query = {}
     
@@ -26,25 +35,25 @@ async def get_services(
     if category and category != "全部":
         query["category"] = category
     
-    services = await db.services.find(query).sort([("order", 1), ("created_at", -1)]).to_list(None)
-    
-    for service in services:
-        service["_id"] = str(service["_id"])
+    services = await db.services.find(query, projection_for(ServiceResponse)).sort(
+        [("order", 1), ("created_at", -1)]
+    ).to_list(None)
     
-    return services
+    entry = response_cache.set(
+        cache_key, render_documents(services, ServiceResponse), tags=("services:list",)
+    )
+    return entry.to_response(request)
 
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_service(service: ServiceCreate, current_user: dict = Depends(get_current_user)):
     """创建服务（需要管理员权限）"""
-    db = get_database()
-    
     service_dict = service.model_dump()
     service_dict["created_at"] = datetime.now()
     
-    result = await db.services.insert_one(service_dict)
-    
-    service_dict["_id"] = str(result.inserted_id)
+    service_dict = await service_repo.insert(service_dict)
+    response_cache.invalidate("services:list")
+    await content_sync.publish(get_database(), SERVICES, str(service_dict["_id"]))
     
     return {"message": "服务创建成功", "service": service_dict}
 
@@ -56,29 +65,11 @@ async def update_service(
     current_user: dict = Depends(get_current_user)
 ):
     """更新服务（需要管理员权限）"""
-    db = get_database()
-    
-    if not ObjectId.is_valid(service_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="无效的服务ID"
-        )
-    
     update_data = {k: v for k, v in service_update.model_dump().items() if v is not None}
     
-    result = await db.services.update_one(
-        {"_id": ObjectId(service_id)},
-        {"$set": update_data}
-    )
-    
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="服务不存在"
-        )
-    
-    updated_service = await db.services.find_one({"_id": ObjectId(service_id)})
-    updated_service["_id"] = str(updated_service["_id"])
+    updated_service = await service_repo.update(service_id, update_data)
+    response_cache.invalidate("services:list")
+    await content_sync.publish(get_database(), SERVICES, service_id)
     
     return {"message": "服务更新成功", "service": updated_service}
 
@@ -86,20 +77,9 @@ async def update_service(
 @router.delete("/{service_id}", response_model=MessageResponse)
 async def delete_service(service_id: str, current_user: dict = Depends(get_current_user)):
     """删除服务（需要管理员权限）"""
-    db = get_database()
-    
-    if not ObjectId.is_valid(service_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="无效的服务ID"
-        )
-    
-    result = await db.services.delete_one({"_id": ObjectId(service_id)})
+    await service_repo.delete(service_id, {"_id": 1})
     
-    if result.deleted_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="服务不存在"
-        )
+    response_cache.invalidate("services:list")
+    await content_sync.publish(get_database(), SERVICES, service_id)
     
     return MessageResponse(message="服务删除成功")
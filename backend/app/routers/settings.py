@@ -1,44 +1,35 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from bson import ObjectId
+from fastapi import APIRouter, Depends, Request
 from typing import Dict, Any
 from datetime import datetime
 from ..schemas import (
     SettingsCreate, SettingsUpdate, SettingsResponse, MessageResponse
 )
 from ..core.database import get_database
+from ..core.repository import settings_repo
+from ..core.settings_store import settings_store
 from ..middleware.auth import get_current_user
 
 router = APIRouter()
 
 
 @router.get("/", response_model=Dict[str, Any])
-async def get_all_settings():
-    """获取所有设置（公开接口）"""
-    db = get_database()
-    
-    settings = await db.settings.find().to_list(None)
-    
-    settings_dict = {}
-    for setting in settings:
-        settings_dict[setting["key"]] = setting["value"]
-    
-    return settings_dict
+async def get_all_settings(request: Request):
+    """获取所有设置（公开接口）
+
+    直接返回内存快照中预先序列化好的响应，不访问数据库。
+    """
+    return settings_store.snapshot.all_entry.to_response(request)
 
 
 @router.get("/{key}", response_model=Dict[str, Any])
-async def get_setting(key: str):
+async def get_setting(key: str, request: Request):
     """获取单个设置（公开接口）"""
-    db = get_database()
+    entry = settings_store.get(key)
     
-    setting = await db.settings.find_one({"key": key})
+    if entry is None:
+        raise settings_repo.not_found()
     
-    if not setting:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="设置不存在"
-        )
-    
-    return {"key": setting["key"], "value": setting["value"]}
+    return entry.to_response(request)
 
 
 @router.post("/", response_model=dict)
@@ -47,47 +38,28 @@ async def create_or_update_setting(
     current_user: dict = Depends(get_current_user)
 ):
     """创建或更新设置（需要管理员权限）"""
-    db = get_database()
+    update_data = {"value": setting.value, "updated_at": datetime.now()}
+    on_insert = {}
+    if setting.description:
+        update_data["description"] = setting.description
+    else:
+        on_insert["description"] = ""
     
-    existing_setting = await db.settings.find_one({"key": setting.key})
+    saved_setting, created = await settings_repo.upsert(
+        {"key": setting.key}, update_data, on_insert
+    )
+    await settings_store.reload(get_database())
     
-    if existing_setting:
-        # 更新现有设置
-        update_data = {"value": setting.value, "updated_at": datetime.now()}
-        if setting.description:
-            update_data["description"] = setting.description
-        
-        await db.settings.update_one(
-            {"key": setting.key},
-            {"$set": update_data}
-        )
-        
-        updated_setting = await db.settings.find_one({"key": setting.key})
-        updated_setting["_id"] = str(updated_setting["_id"])
-        
-        return {"message": "设置更新成功", "setting": updated_setting}
-    else:
-        # 创建新设置
-        setting_dict = setting.model_dump()
-        setting_dict["updated_at"] = datetime.now()
-        
-        result = await db.settings.insert_one(setting_dict)
-        setting_dict["_id"] = str(result.inserted_id)
-        
-        return {"message": "设置创建成功", "setting": setting_dict}
+    if created:
+        return {"message": "设置创建成功", "setting": saved_setting}
+    return {"message": "设置更新成功", "setting": saved_setting}
 
 
 @router.delete("/{key}", response_model=MessageResponse)
 async def delete_setting(key: str, current_user: dict = Depends(get_current_user)):
     """删除设置（需要管理员权限）"""
-    db = get_database()
-    
-    result = await db.settings.delete_one({"key": key})
+    await settings_repo.delete_by({"key": key}, {"_id": 1})
     
-    if result.deleted_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="设置不存在"
-        )
+    await settings_store.reload(get_database())
     
     return MessageResponse(message="设置删除成功")
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, status, Depends, Query, Request
+from typing import Optional
+from datetime import datetime
+from ..core.cache import response_cache
+from ..core.content_sync import BLOGS, content_sync
+from ..core.database import get_database
+from ..core.repository import blog_repo
+from ..core.search import search_index
+from ..core.uploads import cover_variants, store_upload
+from ..middleware.auth import get_current_user
+
+router = APIRouter()
+
+
+@router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def upload_file(
+    request: Request,
+    filename: Optional[str] = Query(None),
+    blog_id: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """上传文件（需要管理员权限）
+
+    请求体为文件的原始字节（非 multipart），边接收边写入磁盘；
+    图片按内容哈希命名，并在后台进程生成 WebP/AVIF 派生图和缩略图。
+    传入 blog_id 时将其设为该文章的封面。
+    """
+    # 在接收请求体之前校验文章 ID
+    if blog_id:
+        blog_repo.object_id(blog_id)
+
+    record, created = await store_upload(request, filename)
+
+    if blog_id:
+        blog = await blog_repo.update(blog_id, {
+            "cover": record["url"],
+            "cover_variants": cover_variants(record),
+            "updated_at": datetime.now()
+        })
+        search_index.upsert(blog)
+        response_cache.invalidate("blogs:list", "blogs:popular", "blogs:related", f"blogs:{blog_id}")
+        await content_sync.publish(get_database(), BLOGS, blog_id)
+
+    return {
+        "message": "上传成功" if created else "文件已存在",
+        "file": record,
+        "deduplicated": not created
+    }
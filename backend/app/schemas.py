@@ -1,4 +1,4 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Dict
 from datetime import datetime
 from pydantic import BaseModel, Field, EmailStr
 from bson import ObjectId
@@ -24,7 +24,7 @@ class PyObjectId(ObjectId):
 # Blog Schemas
 class BlogBase(BaseModel):
     title: str
-    excerpt: str
+    excerpt: str = ""  # 留空时由正文首段自动生成
     content: str
     author: str
     date: datetime = Field(default_factory=datetime.now)
@@ -54,6 +54,13 @@ class BlogUpdate(BaseModel):
 
 class BlogInDB(BlogBase):
     id: str = Field(alias="_id")
+    # 封面为本站上传图片时的派生图集合（缩略图、各宽度 WebP/AVIF）
+    cover_variants: Optional[Dict[str, Any]] = None
+    # 写入时预渲染的正文 HTML、目录和字数
+    content_html: str = ""
+    toc: List[Dict[str, Any]] = []
+    word_count: int = 0
+    views: int = 0
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
 
@@ -64,7 +71,38 @@ class BlogInDB(BlogBase):
 
 
 class BlogResponse(BlogInDB):
-    pass
+    # 搜索结果的高亮片段（字段名 -> HTML）
+    highlight: Optional[Dict[str, str]] = None
+
+
+# 列表模式投影：不含正文 content
+class BlogSummary(BaseModel):
+    id: str = Field(alias="_id")
+    title: str
+    excerpt: str
+    author: str
+    date: datetime
+    read_time: str = "5 分钟"
+    category: str
+    tags: List[str] = []
+    cover: str = ""
+    cover_variants: Optional[Dict[str, Any]] = None
+    word_count: int = 0
+    views: int = 0
+    published: bool = True
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    highlight: Optional[Dict[str, str]] = None
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
+        json_encoders = {ObjectId: str}
+
+
+# 完整列表投影：含 Markdown 正文，预渲染的 content_html / toc 只由详情接口返回
+class BlogListItem(BlogSummary):
+    content: str
 
 
 # Admin Schemas
@@ -148,9 +186,12 @@ class EventBase(BaseModel):
     title: str
     description: str
     date: datetime
+    # 未填写时按 EVENT_DEFAULT_DURATION_HOURS 计算结束时间
+    end_date: Optional[datetime] = None
     location: str = ""
     category: str
     organizer: str = ""
+    # upcoming / ongoing / past 由后台调度器按时间自动维护
     status: str = "upcoming"
     max_participants: int = 0
     registration_url: str = ""
@@ -165,6 +206,7 @@ class EventUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
     location: Optional[str] = None
     category: Optional[str] = None
     organizer: Optional[str] = None
@@ -177,6 +219,7 @@ class EventUpdate(BaseModel):
 class EventInDB(EventBase):
     id: str = Field(alias="_id")
     created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: Optional[datetime] = None
 
     class Config:
         populate_by_name = True
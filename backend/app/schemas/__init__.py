@@ -1 +0,0 @@
-# Schemas module
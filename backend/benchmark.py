@@ -0,0 +1,384 @@
+"""
+性能基准测试脚本
+
+向独立的基准数据库（或进程内 MongoDB 替身）写入可配置规模的语料，
+直接通过 ASGI 驱动真实的 FastAPI 应用，按设定并发执行列表、搜索、详情、
+设置和登录等负载，输出 p50/p95/p99 延迟、吞吐量和进程内存，
+并可保存为基线 JSON，供之后的运行对比。
+
+依赖见 requirements-dev.txt（httpx、mongomock-motor）。
+
+示例：
+    python benchmark.py --blogs 10000 --events 2000 --reseed
+    python benchmark.py --save bench-baseline.json
+    python benchmark.py --compare bench-baseline.json
+    python benchmark.py --in-memory --blogs 2000 --workloads list,detail
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from app.core import database  # noqa: E402
+from app.core.cache import response_cache  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.security import get_password_hash  # noqa: E402
+import app.main as main_module  # noqa: E402
+
+DEFAULT_URI = "mongodb://localhost:27017/snc-blog-bench"
+ADMIN_USERNAME = "bench-admin"
+ADMIN_PASSWORD = "bench-password"
+
+CATEGORIES = ["前端开发", "后端开发", "运维技术", "开发工具", "数据库", "人工智能"]
+TAGS = ["Vue", "Python", "Docker", "Linux", "MongoDB", "FastAPI", "异步编程", "性能优化",
+        "TypeScript", "Git", "容器", "缓存", "索引", "网络", "安全", "测试"]
+WORDS = ["asyncio", "vue", "docker", "index", "cache", "latency", "python", "mongodb",
+         "部署", "性能", "异步", "编程", "数据库", "容器", "组件", "索引", "缓存", "服务器",
+         "网络", "监控", "日志", "并发", "线程", "进程", "内存", "查询", "优化", "测试"]
+SEARCH_TERMS = ["异步编程", "性能", "docker", "数据库 索引", "缓存", "python asyncio", "监控"]
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    parts = []
+    size = 0
+    while size < chars:
+        word = rng.choice(WORDS)
+        parts.append(word)
+        size += len(word) + 1
+    return " ".join(parts)
+
+
+def _blog(rng: random.Random, i: int, base: datetime, content_chars: int) -> Dict[str, Any]:
+    date = base - timedelta(minutes=i * 7)
+    return {
+        "title": f"{rng.choice(WORDS)} {rng.choice(WORDS)} 实践 #{i}",
+        "excerpt": _text(rng, 120),
+        "content": _text(rng, content_chars),
+        "author": "bench",
+        "date": date,
+        "read_time": "5 分钟",
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(TAGS, 3),
+        "cover": "",
+        "published": rng.random() > 0.1,
+        "created_at": date,
+        "updated_at": date,
+    }
+
+
+def _event(rng: random.Random, i: int, base: datetime) -> Dict[str, Any]:
+    return {
+        "title": f"活动 #{i}",
+        "description": _text(rng, 300),
+        "date": base + timedelta(days=rng.randint(-365, 365)),
+        "location": "线上",
+        "category": rng.choice(CATEGORIES),
+        "organizer": "bench",
+        "status": "upcoming",
+        "max_participants": 100,
+        "registration_url": "",
+        "published": True,
+        "created_at": base,
+    }
+
+
+async def seed(db, args) -> None:
+    """写入基准语料（已有足量数据且未指定 --reseed 时跳过）"""
+    if args.reseed:
+        for name in ("blogs", "events", "services", "settings", "admins"):
+            await db[name].drop()
+
+    rng = random.Random(args.seed)
+    base = datetime(2025, 1, 1)
+
+    existing = await db.blogs.count_documents({})
+    if existing < args.blogs:
+        print(f"📝 写入文章 {existing} -> {args.blogs}")
+        for start in range(existing, args.blogs, args.batch_size):
+            end = min(start + args.batch_size, args.blogs)
+            await db.blogs.insert_many(
+                [_blog(rng, i, base, args.content_chars) for i in range(start, end)],
+                ordered=False
+            )
+
+    existing = await db.events.count_documents({})
+    if existing < args.events:
+        print(f"📅 写入活动 {existing} -> {args.events}")
+        for start in range(existing, args.events, args.batch_size):
+            end = min(start + args.batch_size, args.events)
+            await db.events.insert_many([_event(rng, i, base) for i in range(start, end)], ordered=False)
+
+    if await db.services.count_documents({}) == 0:
+        await db.services.insert_many([
+            {"name": f"服务 {i}", "description": "bench", "url": "https://example.com",
+             "icon": "🔗", "category": rng.choice(CATEGORIES), "order": i, "active": True,
+             "created_at": base}
+            for i in range(20)
+        ])
+
+    if await db.settings.count_documents({}) == 0:
+        await db.settings.insert_many([
+            {"key": f"site_{i}", "value": _text(rng, 40), "description": "", "updated_at": base}
+            for i in range(30)
+        ])
+
+    if not await db.admins.find_one({"username": ADMIN_USERNAME}):
+        await db.admins.insert_one({
+            "username": ADMIN_USERNAME,
+            "email": "bench@example.com",
+            "hashed_password": get_password_hash(ADMIN_PASSWORD),
+            "is_first_login": False,
+            "created_at": base,
+        })
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法百分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def rss_mb() -> Dict[str, float]:
+    """当前常驻内存与峰值常驻内存（MB）"""
+    current = 0.0
+    try:
+        with open("/proc/self/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) / 1024
+                    break
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以 KB 为单位
+    peak = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return {"rss_mb": round(current, 1), "peak_rss_mb": round(peak, 1)}
+
+
+RequestFactory = Callable[[random.Random], Dict[str, Any]]
+
+
+def build_workloads(blog_ids: List[str]) -> Dict[str, RequestFactory]:
+    """各负载的请求生成函数，返回 httpx.request 的参数"""
+    def listing(rng):
+        params = {"limit": 20, "view": "list"}
+        if rng.random() < 0.5:
+            params["category"] = rng.choice(CATEGORIES)
+        return {"method": "GET", "url": "/api/blogs/", "params": params}
+
+    def search(rng):
+        return {"method": "GET", "url": "/api/blogs/",
+                "params": {"search": rng.choice(SEARCH_TERMS), "limit": 20, "view": "list"}}
+
+    def detail(rng):
+        return {"method": "GET", "url": f"/api/blogs/{rng.choice(blog_ids)}"}
+
+    def events(rng):
+        return {"method": "GET", "url": "/api/events/"}
+
+    def settings_(rng):
+        return {"method": "GET", "url": "/api/settings/"}
+
+    def login(rng):
+        return {"method": "POST", "url": "/api/auth/login",
+                "json": {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}}
+
+    return {
+        "list": listing,
+        "search": search,
+        "detail": detail,
+        "events": events,
+        "settings": settings_,
+        "login": login,
+    }
+
+
+async def run_workload(
+    client: httpx.AsyncClient,
+    factory: RequestFactory,
+    requests: int,
+    concurrency: int,
+    seed_value: int,
+    no_cache: bool
+) -> Dict[str, Any]:
+    """以固定并发执行 requests 个请求并统计延迟"""
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(worker_id: int):
+        nonlocal remaining, errors
+        rng = random.Random(seed_value * 1000 + worker_id)
+        while remaining > 0:
+            remaining -= 1
+            if no_cache:
+                response_cache.clear()
+            started = time.perf_counter()
+            response = await client.request(**factory(rng))
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "concurrency": concurrency,
+        "throughput_rps": round(len(ms) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(ms[-1], 3) if ms else 0.0,
+        **rss_mb(),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """打印与基线的差异（延迟降低、吞吐升高为改进）"""
+    print("\n📊 与基线对比")
+    print(f"{'负载':<10}{'指标':<16}{'基线':>12}{'本次':>12}{'变化':>10}")
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            print(f"{name:<10}（基线中无此负载）")
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "peak_rss_mb"):
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            print(f"{name:<10}{metric:<16}{old:>12}{new:>12}{change:>+9.1f}%")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="SNC Blog API 性能基准测试")
+    parser.add_argument("--mongodb-uri", default=os.environ.get("BENCH_MONGODB_URI", DEFAULT_URI),
+                        help="基准数据库地址（不要指向生产库，--reseed 会清空集合）")
+    parser.add_argument("--in-memory", action="store_true", help="使用 mongomock-motor 进程内替身")
+    parser.add_argument("--blogs", type=int, default=10000, help="文章数量")
+    parser.add_argument("--events", type=int, default=2000, help="活动数量")
+    parser.add_argument("--content-chars", type=int, default=3000, help="每篇正文字符数")
+    parser.add_argument("--batch-size", type=int, default=1000, help="写入批大小")
+    parser.add_argument("--reseed", action="store_true", help="清空基准库后重新写入")
+    parser.add_argument("--workloads", default="list,search,detail,events,settings,login",
+                        help="逗号分隔的负载名称")
+    parser.add_argument("--requests", type=int, default=2000, help="每个负载的请求数")
+    parser.add_argument("--login-requests", type=int, default=100, help="登录负载的请求数（bcrypt 开销大）")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发数")
+    parser.add_argument("--no-cache", action="store_true", help="每个请求前清空响应缓存")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--save", help="将结果保存为基线 JSON")
+    parser.add_argument("--compare", help="与指定基线 JSON 对比")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    args = parse_args(argv)
+
+    # 先写入语料，再执行应用启动流程（索引、搜索索引等基于完整语料构建）
+    if args.in_memory:
+        from mongomock_motor import AsyncMongoMockClient
+
+        memory_client = AsyncMongoMockClient()
+
+        async def connect_in_memory():
+            database.client = memory_client
+            database.db = memory_client["snc-blog-bench"]
+            print("✅ 使用进程内 MongoDB 替身")
+
+        main_module.connect_to_mongo = connect_in_memory
+        # 替身不支持 change stream；单进程基准也无需跨 worker 同步
+        settings.site_settings_watch = False
+        settings.token_revocation_watch = False
+        settings.content_sync_watch = False
+        await seed(memory_client["snc-blog-bench"], args)
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        settings.mongodb_uri = args.mongodb_uri
+        seed_client = AsyncIOMotorClient(args.mongodb_uri)
+        try:
+            await seed(seed_client.get_default_database(), args)
+        finally:
+            seed_client.close()
+
+    await main_module.app.router.startup()
+
+    db = database.get_database()
+    blog_ids = [str(doc["_id"]) async for doc in db.blogs.find({}, {"_id": 1}).limit(5000)]
+    workloads = build_workloads(blog_ids)
+
+    results: Dict[str, Any] = {}
+    transport = httpx.ASGITransport(app=main_module.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for index, name in enumerate(args.workloads.split(",")):
+                name = name.strip()
+                if name not in workloads:
+                    print(f"⚠️  未知负载：{name}")
+                    continue
+                requests = args.login_requests if name == "login" else args.requests
+                concurrency = min(args.concurrency, requests)
+                # 预热：填充缓存、建立连接
+                await run_workload(client, workloads[name], min(50, requests), concurrency,
+                                   args.seed + index, args.no_cache)
+                result = await run_workload(client, workloads[name], requests, concurrency,
+                                            args.seed + index, args.no_cache)
+                results[name] = result
+                print(
+                    f"🏁 {name:<9} {result['throughput_rps']:>9} req/s  "
+                    f"p50 {result['p50_ms']:>8}ms  p95 {result['p95_ms']:>8}ms  "
+                    f"p99 {result['p99_ms']:>8}ms  错误 {result['errors']}  RSS {result['rss_mb']}MB"
+                )
+    finally:
+        await main_module.app.router.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "in_memory": args.in_memory,
+            "blogs": args.blogs,
+            "events": args.events,
+            "content_chars": args.content_chars,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "no_cache": args.no_cache,
+        },
+        "results": results,
+    }
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            compare(results, json.load(baseline_file))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存到 {args.save}")
+
+    return report
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
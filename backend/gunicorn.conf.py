@@ -0,0 +1,38 @@
+"""生产环境 gunicorn 配置（gunicorn app.main:app -c gunicorn.conf.py）"""
+import os
+
+from app.core.config import settings
+
+
+def _cpu_count() -> int:
+    # 容器中按实际可用的 CPU 计算
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{settings.port}"
+workers = settings.workers or _cpu_count()
+worker_class = "app.core.worker.ProductionWorker"
+
+# 在主进程中导入应用，worker fork 后共享只读内存
+# （数据库连接、后台任务等在每个 worker 的 startup 事件中创建）
+preload_app = True
+
+keepalive = settings.keepalive_seconds
+backlog = settings.backlog
+
+# 处理一定数量的请求后重启 worker，抖动避免所有 worker 同时重启
+max_requests = settings.max_requests
+max_requests_jitter = settings.max_requests_jitter
+
+# 留出执行 shutdown 事件（写入剩余浏览计数、关闭连接）的时间
+graceful_timeout = settings.graceful_timeout_seconds + 10
+timeout = 60
+
+# 只信任反向代理（nginx）转发的客户端地址与协议，直连请求的 X-Forwarded-* 头被忽略
+forwarded_allow_ips = settings.forwarded_allow_ips
+accesslog = "-"
+errorlog = "-"
+loglevel = "info"
@@ -1,3 +1,7 @@
+"""开发服务器（单进程，代码变更自动重载）
+
+生产环境使用 gunicorn：gunicorn app.main:app -c gunicorn.conf.py
+"""
 import uvicorn
 from app.core.config import settings
 
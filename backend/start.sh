@@ -24,6 +24,6 @@ if [ ! -f ".env" ]; then
     exit 1
 fi
 
-# 启动服务器
+# 启动服务器（生产模式：gunicorn 多 worker，开发时使用 python run.py）
 echo "✅ 启动服务器..."
-python run.py
+exec gunicorn app.main:app -c gunicorn.conf.py
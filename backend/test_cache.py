@@ -0,0 +1,168 @@
+"""
+响应缓存与条件请求的单元测试（不需要启动服务器）
+运行：python -m pytest test_cache.py
+"""
+import os
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("JWT_SECRET", "test")
+
+from starlette.requests import Request
+
+from app.core.cache import CacheEntry, ResponseCache, document_timestamp, make_cache_key
+
+
+def _request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def _cache(max_entries=10, max_bytes=1 << 20, ttl=60.0):
+    return ResponseCache(max_entries=max_entries, max_bytes=max_bytes, default_ttl=ttl)
+
+
+def test_lru_eviction_by_entry_count():
+    """超过条目上限时淘汰最久未使用的条目，读取会刷新使用顺序"""
+    cache = _cache(max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") is not None
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget():
+    """按响应体与头部的总字节数淘汰，超过整个上限的条目不缓存"""
+    probe = _cache().set("probe", b"x" * 100)
+    cache = _cache(max_bytes=probe.size * 2)
+    cache.set("a", b"x" * 100)
+    cache.set("b", b"y" * 100)
+    assert cache.stats()["bytes"] == cache.get("a").size + cache.get("b").size
+    cache.set("c", b"z" * 100)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+    entry = cache.set("huge", b"h" * (probe.size * 3))
+    assert entry.body.startswith(b"h")
+    assert cache.get("huge") is None
+
+
+def test_compressed_variants_count_towards_budget():
+    """压缩结果计入占用，条目被移出后再压缩不再计入"""
+    cache = _cache()
+    entry = cache.set("a", b'{"k": "' + b"v" * 4000 + b'"}')
+    before = cache.stats()["bytes"]
+    entry.encoded("gzip")
+    assert cache.stats()["bytes"] == before + len(entry.variants["gzip"])
+
+    cache.clear()
+    entry.encoded("gzip")
+    assert cache.stats()["bytes"] == 0
+
+
+def test_ttl_expiry():
+    cache = _cache(ttl=60.0)
+    cache.set("short", b"1", ttl=0.01)
+    cache.set("long", b"2")
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.get("long") is not None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_tag_invalidation():
+    """按标签失效只影响带有该标签的条目，重复写入同一键不留下旧标签"""
+    cache = _cache()
+    cache.set("list", b"1", tags=("blogs:list",))
+    cache.set("detail", b"2", tags=("blogs:1", "blogs:related"))
+    cache.set("events", b"3", tags=("events:list",))
+    cache.set("detail", b"2b", tags=("blogs:1",))
+
+    assert cache.invalidate("blogs:related") == 0
+    assert cache.invalidate("blogs:list", "blogs:1") == 2
+    assert cache.get("list") is None and cache.get("detail") is None
+    assert cache.get("events") is not None
+    assert cache.invalidate("blogs:list") == 0
+
+
+def test_cache_key_normalization():
+    """参数顺序无关，None 参数忽略"""
+    assert make_cache_key("blogs:list", b=2, a=1, c=None) == make_cache_key("blogs:list", a=1, b=2)
+    assert make_cache_key("blogs:list") == "blogs:list"
+    assert make_cache_key("blogs:list", search="a&b") != make_cache_key("blogs:list", search="a", b="")
+
+
+def test_validators():
+    """ETag 由响应体决定，Last-Modified 取文档时间并截去微秒"""
+    modified = datetime(2024, 3, 4, 5, 6, 7, 890000)
+    entry = CacheEntry(body=b"{}", last_modified=modified)
+    assert entry.etag == CacheEntry(body=b"{}").etag != CacheEntry(body=b"[]").etag
+    assert entry.headers["Last-Modified"] == "Mon, 04 Mar 2024 05:06:07 GMT"
+    assert entry.headers["Cache-Control"] == "no-cache"
+    assert document_timestamp({"created_at": modified}) == modified
+    assert document_timestamp({"created_at": modified, "updated_at": datetime(2025, 1, 1)}).year == 2025
+
+
+def test_if_none_match():
+    """If-None-Match 使用弱比较，支持列表和 *，也接受压缩表示的 ETag"""
+    entry = CacheEntry(body=b'{"a": 1}')
+    etag = entry.etag
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*", etag[:-1] + '-gzip"'):
+        assert entry.to_response(_request(if_none_match=header)).status_code == 304, header
+    assert entry.to_response(_request(if_none_match='"other"')).status_code == 200
+    # If-None-Match 存在时忽略 If-Modified-Since
+    assert entry.to_response(_request(
+        if_none_match='"other"', if_modified_since="Fri, 01 Jan 2100 00:00:00 GMT"
+    )).status_code == 200
+
+
+def test_if_modified_since():
+    entry = CacheEntry(body=b"{}", last_modified=datetime(2024, 1, 1, 12, 0, 0, 500000))
+    assert entry.to_response(_request(if_modified_since="Mon, 01 Jan 2024 12:00:00 GMT")).status_code == 304
+    assert entry.to_response(_request(if_modified_since="Mon, 01 Jan 2024 11:59:59 GMT")).status_code == 200
+    assert entry.to_response(_request(if_modified_since="not a date")).status_code == 200
+    aware = datetime(2024, 1, 1, 20, 0, tzinfo=timezone.utc)
+    assert CacheEntry(body=b"{}", last_modified=aware).last_modified == aware
+
+
+def test_encoded_variant_revalidation():
+    """压缩表示带编码后缀的 ETag，重新验证时返回 304 且不重新压缩"""
+    entry = CacheEntry(body=b'{"k": "' + b"v" * 4000 + b'"}')
+    response = entry.to_response(_request(accept_encoding="gzip"))
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == entry.etag[:-1] + '-gzip"'
+    assert "Accept-Encoding" in response.headers["vary"]
+    compressed = entry.variants["gzip"]
+
+    revalidated = entry.to_response(_request(
+        accept_encoding="gzip", if_none_match=response.headers["etag"]
+    ))
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == response.headers["etag"]
+    assert entry.variants["gzip"] is compressed
+
+    plain = entry.to_response(_request())
+    assert "content-encoding" not in plain.headers
+    assert plain.body == entry.body
+
+
+if __name__ == "__main__":
+    test_lru_eviction_by_entry_count()
+    test_byte_budget()
+    test_compressed_variants_count_towards_budget()
+    test_ttl_expiry()
+    test_tag_invalidation()
+    test_cache_key_normalization()
+    test_validators()
+    test_if_none_match()
+    test_if_modified_since()
+    test_encoded_variant_revalidation()
+    print("✅ 响应缓存测试通过")
@@ -0,0 +1,129 @@
+"""
+响应压缩协商与中间件的单元测试（不需要启动服务器）
+运行：python -m pytest test_compression.py
+"""
+import asyncio
+import gzip
+import os
+
+os.environ.setdefault("JWT_SECRET", "test")
+
+from app.core.compression import (
+    ENCODINGS, CompressionMiddleware, encoded_etag, is_compressible, negotiate, weak_etag
+)
+from app.core.config import settings
+
+LARGE = b'{"data": "' + b"x" * (settings.compression_min_bytes * 2) + b'"}'
+
+
+def test_negotiate_q_values():
+    """按 q 值选择，q=0 表示拒绝，同权重时按服务端偏好"""
+    assert negotiate(None) is None
+    assert negotiate("") is None
+    assert negotiate("identity") is None
+    assert negotiate("gzip") == "gzip"
+    assert negotiate("GZIP;q=0.5") == "gzip"
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("gzip;q=abc") is None
+    assert negotiate("*") == ENCODINGS[0]
+    assert negotiate("*;q=0.5, gzip;q=0") == (ENCODINGS[0] if ENCODINGS[0] != "gzip" else None)
+    assert negotiate(", ".join(ENCODINGS)) == ENCODINGS[0]
+
+
+def test_negotiate_ignores_extension_parameters():
+    """q 之外的参数不影响权重"""
+    assert negotiate("gzip;level=1") == "gzip"
+    assert negotiate("gzip;foo=bar;q=0") is None
+
+
+def test_compressible_types():
+    assert is_compressible("application/json")
+    assert is_compressible("text/html; charset=utf-8")
+    assert is_compressible("application/rss+xml")
+    assert is_compressible("application/xml")
+    assert not is_compressible("image/png")
+    assert not is_compressible("application/octet-stream")
+
+
+def test_etag_helpers():
+    assert encoded_etag('"abc"', "gzip") == '"abc-gzip"'
+    assert weak_etag('"abc"') == 'W/"abc"'
+    assert weak_etag('W/"abc"') == 'W/"abc"'
+
+
+def _run(app, accept_encoding=None):
+    """通过中间件调用 ASGI 应用，返回 (状态码, 头部, 响应体)"""
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(CompressionMiddleware(app)(scope, receive, send))
+    start = messages[0]
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], {name.decode(): value.decode() for name, value in start["headers"]}, body
+
+
+def _app(body, content_type=b"application/json", chunks=1, extra_headers=()):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode()),
+            (b"etag", b'"v1"'),
+            *extra_headers,
+        ]})
+        size = -(-len(body) // chunks)
+        for index in range(chunks):
+            part = body[index * size:(index + 1) * size]
+            await send({"type": "http.response.body", "body": part, "more_body": index < chunks - 1})
+    return app
+
+
+def test_middleware_compresses_and_weakens_etag():
+    status, headers, body = _run(_app(LARGE), "gzip")
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert headers["etag"] == 'W/"v1"'
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(body)
+    assert gzip.decompress(body) == LARGE
+
+
+def test_middleware_streams_chunked_bodies():
+    status, headers, body = _run(_app(LARGE, chunks=4), "gzip")
+    assert "content-length" not in headers
+    assert gzip.decompress(body) == LARGE
+
+
+def test_middleware_passthrough():
+    """小响应、非文本类型、已编码的响应和不接受压缩的客户端原样返回"""
+    small = b'{"a": 1}'
+    _, headers, body = _run(_app(small), "gzip")
+    assert body == small and "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+
+    _, headers, body = _run(_app(LARGE, content_type=b"image/png"), "gzip")
+    assert body == LARGE and "vary" not in headers
+
+    encoded = gzip.compress(LARGE)
+    _, headers, body = _run(_app(encoded, extra_headers=[(b"content-encoding", b"gzip")]), "gzip")
+    assert body == encoded and headers["etag"] == '"v1"'
+
+    _, headers, body = _run(_app(LARGE), None)
+    assert body == LARGE and "vary" not in headers
+
+
+if __name__ == "__main__":
+    test_negotiate_q_values()
+    test_negotiate_ignores_extension_parameters()
+    test_compressible_types()
+    test_etag_helpers()
+    test_middleware_compresses_and_weakens_etag()
+    test_middleware_streams_chunked_bodies()
+    test_middleware_passthrough()
+    print("✅ 响应压缩测试通过")
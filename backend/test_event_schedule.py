@@ -0,0 +1,100 @@
+"""
+活动状态调度的单元测试（不需要启动服务器）
+运行：python -m pytest test_event_schedule.py
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("JWT_SECRET", "test")
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.core.cache import response_cache
+from app.core.event_schedule import (
+    ONGOING, PAST, UPCOMING, EventScheduler, default_duration, status_for,
+)
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+
+def test_status_for_boundaries():
+    """开始时刻进入 ongoing，结束时刻进入 past"""
+    start = NOW
+    end = NOW + timedelta(hours=3)
+    assert status_for(start, end, start - timedelta(seconds=1)) == UPCOMING
+    assert status_for(start, end, start) == ONGOING
+    assert status_for(start, end, end - timedelta(seconds=1)) == ONGOING
+    assert status_for(start, end, end) == PAST
+
+
+def test_status_for_default_duration_and_timezones():
+    """未填写结束时间按默认时长结束；带时区的时间按 UTC 比较"""
+    default_end = NOW + default_duration()
+    assert status_for(NOW, None, default_end - timedelta(seconds=1)) == ONGOING
+    assert status_for(NOW, None, default_end) == PAST
+
+    # 北京时间 20:00 即 UTC 12:00
+    beijing = datetime(2024, 6, 1, 20, 0, tzinfo=timezone(timedelta(hours=8)))
+    assert status_for(beijing, None, NOW - timedelta(minutes=1)) == UPCOMING
+    assert status_for(beijing, None, NOW) == ONGOING
+
+
+def test_apply_transitions_and_invalidates_cache():
+    """批量修正状态，只修改需要改变的活动，不处理 cancelled；跨越边界时使缓存失效"""
+    hour = timedelta(hours=1)
+    events = {
+        "future": {"date": NOW + hour, "status": UPCOMING},
+        "started": {"date": NOW - hour, "end_date": NOW + hour, "status": UPCOMING},
+        "default_running": {"date": NOW - hour, "status": PAST},
+        "default_ended": {"date": NOW - 3 * hour, "status": ONGOING},
+        "ended": {"date": NOW - 5 * hour, "end_date": NOW - hour, "status": UPCOMING},
+        "moved_later": {"date": NOW + 2 * hour, "status": PAST},
+        "cancelled": {"date": NOW - 5 * hour, "status": "cancelled"},
+    }
+    ids = {name: ObjectId() for name in events}
+
+    async def scenario():
+        db = AsyncMongoMockClient()["test_event_schedule"]
+        await db.events.insert_many([{"_id": ids[name], **doc} for name, doc in events.items()])
+        scheduler = EventScheduler()
+
+        modified = await scheduler.apply(db, NOW)
+        statuses = {doc["_id"]: doc["status"] async for doc in db.events.find()}
+        # 状态已正确时再次运行不修改任何活动
+        again = await scheduler.apply(db, NOW)
+
+        # 活动开始后，该活动的详情缓存和列表缓存失效
+        response_cache.set("events:list", b"[]", tags=["events:list"])
+        response_cache.set(f"events:{ids['future']}", b"{}", tags=[f"events:{ids['future']}"])
+        later = NOW + hour + timedelta(minutes=1)
+        started = await scheduler.apply(db, later)
+        return modified, statuses, again, started, scheduler, await scheduler.next_transition(db, later)
+
+    modified, statuses, again, started, scheduler, upcoming = asyncio.run(scenario())
+    assert {name: statuses[ids[name]] for name in events} == {
+        "future": UPCOMING,
+        "started": ONGOING,
+        "default_running": ONGOING,
+        "default_ended": PAST,
+        "ended": PAST,
+        "moved_later": UPCOMING,
+        "cancelled": "cancelled",
+    }
+    assert modified == 5
+    assert again == 0
+    # future 开始，started 与 default_running 结束
+    assert started == 3
+    assert response_cache.get("events:list") is None
+    assert response_cache.get(f"events:{ids['future']}") is None
+    assert scheduler.runs == 3
+    # 下一个边界：moved_later 在 NOW + 2h 开始
+    assert upcoming == NOW + timedelta(hours=2)
+
+
+if __name__ == "__main__":
+    test_status_for_boundaries()
+    test_status_for_default_duration_and_timezones()
+    test_apply_transitions_and_invalidates_cache()
+    print("✅ 活动状态调度测试通过")
@@ -0,0 +1,146 @@
+"""
+RSS / Atom / sitemap 预生成的单元测试（不需要启动服务器）
+运行：python -m pytest test_feeds.py
+"""
+import asyncio
+import os
+import re
+from datetime import datetime, timedelta
+
+os.environ.setdefault("JWT_SECRET", "test")
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.core import feeds
+from app.core.feeds import ATOM, FEED_ITEMS, RSS, SITEMAP, STATIC_PAGES, FeedStore, site_url
+
+START = datetime(2024, 1, 1)
+
+
+def _db():
+    return AsyncMongoMockClient()["test_feeds"]
+
+
+async def _seed(db, published, drafts=0):
+    docs = [
+        {
+            "_id": ObjectId(),
+            "title": f"文章 {i} <&>",
+            "excerpt": "摘要",
+            "content_html": "<p>正文</p>",
+            "author": "作者",
+            "category": "技术",
+            "tags": ["vue"],
+            "date": START + timedelta(days=i),
+            "published": i < published,
+        }
+        for i in range(published + drafts)
+    ]
+    await db.blogs.insert_many(docs)
+    return [str(doc["_id"]) for doc in docs if doc["published"]]
+
+
+def _locs(body: bytes):
+    return re.findall(r"<loc>(.*?)</loc>", body.decode())
+
+
+def test_feeds_regenerate_only_when_dirty():
+    """连续请求复用已生成结果，标记为脏后只重新生成对应的订阅"""
+    async def scenario():
+        db = _db()
+        ids = await _seed(db, FEED_ITEMS + 5, drafts=3)
+        store = FeedStore()
+        rss = await store.get(RSS, db)
+        await store.get(RSS, db)
+        await store.get(ATOM, db)
+        assert store.generations == 2
+
+        body = rss.body.decode()
+        assert body.count("<item>") == FEED_ITEMS
+        # 按日期倒序，草稿不出现，标题经过转义
+        assert f"{site_url()}/blog/{ids[-1]}" in body
+        assert f"{site_url()}/blog/{ids[0]}" not in body
+        assert "&lt;&amp;&gt;" in body
+        assert rss.etag
+
+        store.mark_dirty(RSS)
+        await store.get(RSS, db)
+        await store.get(ATOM, db)
+        assert store.generations == 3
+
+        # 不带参数时全部标记为脏
+        store.mark_dirty()
+        assert store.dirty == {RSS, ATOM, SITEMAP}
+
+    asyncio.run(scenario())
+
+
+def test_single_sitemap_lists_every_post():
+    """文章数未超过上限时输出单个 urlset，活动页的 lastmod 取最近修改的活动"""
+    async def scenario():
+        db = _db()
+        ids = await _seed(db, 4, drafts=2)
+        await db.events.insert_many([
+            {"published": True, "created_at": START, "updated_at": START + timedelta(days=3)},
+            # 早期没有 updated_at 的活动按 created_at 计
+            {"published": True, "created_at": START + timedelta(days=5)},
+            {"published": False, "created_at": START + timedelta(days=9)},
+        ])
+        store = FeedStore()
+        entry = await store.get(SITEMAP, db)
+        return ids, entry.body.decode(), store
+
+    ids, body, store = asyncio.run(scenario())
+    assert body.count("<urlset") == 1 and "<sitemapindex" not in body
+    locs = _locs(body.encode())
+    assert len(locs) == len(STATIC_PAGES) + len(ids)
+    assert sorted(locs[len(STATIC_PAGES):]) == sorted(f"{site_url()}/blog/{i}" for i in ids)
+    assert (
+        f"<loc>{site_url()}/events</loc><lastmod>2024-01-06T00:00:00Z</lastmod>" in body
+    )
+    assert store.sitemap_bounds == []
+    assert not store.has_sitemap_part(0)
+
+
+def test_sharded_sitemap_streams_each_post_once():
+    """超过上限时输出 sitemap 索引，各分片合起来恰好包含每篇已发布文章一次"""
+    async def scenario():
+        db = _db()
+        ids = await _seed(db, 7, drafts=2)
+        store = FeedStore()
+        index = await store.get(SITEMAP, db)
+        parts = []
+        part = 0
+        while store.has_sitemap_part(part):
+            chunks = [chunk async for chunk in store.stream_sitemap_part(part, db)]
+            parts.append(b"".join(chunks))
+            part += 1
+        return ids, index.body, parts, store
+
+    original = feeds.SITEMAP_MAX_URLS
+    feeds.SITEMAP_MAX_URLS = 3
+    try:
+        ids, index, parts, store = asyncio.run(scenario())
+    finally:
+        feeds.SITEMAP_MAX_URLS = original
+
+    # 7 篇文章每片 3 篇，加上静态页面分片 0，共 4 个分片
+    assert b"<sitemapindex" in index
+    assert _locs(index) == [f"{site_url()}/sitemap-{i}.xml" for i in range(4)]
+    assert len(parts) == 4 and len(store.sitemap_bounds) == 3
+    assert not store.has_sitemap_part(4) and not store.has_sitemap_part(-1)
+
+    assert _locs(parts[0]) == [site_url() + path for path, _ in STATIC_PAGES]
+    posts = [loc for part in parts[1:] for loc in _locs(part)]
+    assert [len(_locs(part)) for part in parts[1:]] == [3, 3, 1]
+    assert sorted(posts) == sorted(f"{site_url()}/blog/{i}" for i in ids)
+    for part in parts:
+        assert part.startswith(b"<?xml") and part.endswith(b"</urlset>\n")
+
+
+if __name__ == "__main__":
+    test_feeds_regenerate_only_when_dirty()
+    test_single_sitemap_lists_every_post()
+    test_sharded_sitemap_streams_each_post_once()
+    print("✅ 订阅与 sitemap 测试通过")
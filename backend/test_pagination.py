@@ -0,0 +1,89 @@
+"""
+键集分页游标的单元测试（不需要启动服务器）
+运行：python -m pytest test_pagination.py
+"""
+import os
+from datetime import datetime, timedelta
+
+os.environ.setdefault("JWT_SECRET", "test")
+
+import mongomock
+from bson import ObjectId
+
+from app.core.pagination import (
+    InvalidCursor, decode_cursor, decode_keyset_cursor, encode_cursor,
+    encode_keyset_cursor, keyset_filter
+)
+
+
+def _collection(dates):
+    collection = mongomock.MongoClient().db.blogs
+    collection.insert_many([{"_id": ObjectId(), "date": date} for date in dates])
+    return collection
+
+
+def _pages(collection, limit):
+    """按 get_blogs 的方式逐页读取，返回每页的 _id 列表"""
+    pages, cursor = [], None
+    while True:
+        query = keyset_filter(cursor) or {}
+        docs = list(collection.find(query).sort([("date", -1), ("_id", -1)]).limit(limit + 1))
+        pages.append([doc["_id"] for doc in docs[:limit]])
+        if len(docs) <= limit:
+            return pages
+        cursor = encode_keyset_cursor(docs[limit - 1])
+
+
+def test_cursor_round_trip():
+    """游标是不带填充的 URL 安全字符串，解码后与原数据一致"""
+    data = {"o": 40, "v": "2024-01-01T00:00:00"}
+    cursor = encode_cursor(data)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor) == data
+
+
+def test_keyset_cursor_round_trip():
+    doc = {"_id": ObjectId(), "date": datetime(2024, 5, 6, 7, 8, 9, 123000)}
+    assert decode_keyset_cursor(encode_keyset_cursor(doc)) == (doc["date"], doc["_id"])
+
+
+def test_invalid_cursors():
+    """格式错误、不是对象或缺少字段的游标都报 InvalidCursor"""
+    for cursor in ("%%%", encode_cursor([1, 2]), encode_cursor({"v": "x", "id": "y"}), encode_cursor({"o": 1})):
+        try:
+            keyset_filter(cursor)
+        except InvalidCursor:
+            continue
+        raise AssertionError(f"游标 {cursor!r} 应当无效")
+
+
+def test_keyset_filter_shape():
+    """倒序时取 date 更早的，或 date 相同而 _id 更小的"""
+    doc = {"_id": ObjectId(), "date": datetime(2024, 1, 1)}
+    assert keyset_filter(None) is None
+    assert keyset_filter(encode_keyset_cursor(doc)) == {"$or": [
+        {"date": {"$lt": doc["date"]}},
+        {"date": doc["date"], "_id": {"$lt": doc["_id"]}},
+    ]}
+    assert "$gt" in keyset_filter(encode_keyset_cursor(doc), direction=1)["$or"][0]["date"]
+
+
+def test_pages_cover_all_documents_with_ties():
+    """日期大量重复时逐页读取既不重复也不遗漏，顺序与一次性排序一致"""
+    base = datetime(2024, 1, 1)
+    dates = [base + timedelta(days=i % 4) for i in range(23)]
+    collection = _collection(dates)
+    expected = [doc["_id"] for doc in collection.find().sort([("date", -1), ("_id", -1)])]
+    for limit in (1, 3, 5, 23, 50):
+        pages = _pages(collection, limit)
+        assert [oid for page in pages for oid in page] == expected
+        assert all(0 < len(page) <= limit for page in pages)
+
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    test_keyset_cursor_round_trip()
+    test_invalid_cursors()
+    test_keyset_filter_shape()
+    test_pages_cover_all_documents_with_ties()
+    print("✅ 分页游标测试通过")
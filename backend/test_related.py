@@ -0,0 +1,126 @@
+"""
+相关文章索引的单元测试（不需要启动服务器）
+运行：python -m pytest test_related.py
+"""
+import asyncio
+import os
+import random
+
+os.environ.setdefault("JWT_SECRET", "test")
+
+import numpy as np
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.core.related import MIN_SCORE, RELATED_COUNT, RelatedIndex
+
+WORDS = [f"term{i}" for i in range(40)] + ["数据库", "缓存", "容器", "前端"]
+TAGS = ["vue", "python", "go", "db", "ops"]
+
+
+def _doc(rng, **fields):
+    doc = {
+        "_id": ObjectId(),
+        "title": " ".join(rng.sample(WORDS, 3)),
+        "excerpt": "",
+        "content": " ".join(rng.choices(WORDS, k=30)),
+        "tags": rng.sample(TAGS, rng.randint(0, 3)),
+        "published": True,
+    }
+    doc.update(fields)
+    return doc
+
+
+def _assert_neighbors_exact(index):
+    """每篇文章的邻居与按当前向量暴力计算的前 N 名一致，引用表与邻居表互逆"""
+    for doc_id, row in index.rows.items():
+        scores = index._scores(np.array([row]))[0]
+        expected = sorted(
+            (float(score) for score in scores if score >= MIN_SCORE), reverse=True
+        )[:RELATED_COUNT]
+        got = [float(scores[index.rows[other]]) for other, _ in index.neighbors[doc_id]]
+        assert np.allclose(got, expected, atol=1e-5), doc_id
+
+    referrers = {}
+    for doc_id, ranked in index.neighbors.items():
+        for other, _ in ranked:
+            referrers.setdefault(other, set()).add(doc_id)
+    assert {k: v for k, v in index.referrers.items() if v} == referrers
+    assert set(index.neighbors) == set(index.rows) == set(index.ids)
+
+
+def test_tag_and_text_similarity():
+    """标签和正文都相近的文章排在前面，自身不出现在相关列表中"""
+    index = RelatedIndex()
+    docs = [
+        {"_id": "a", "title": "Vue 组件 教程", "content": "组件 通信 props", "tags": ["vue"]},
+        {"_id": "b", "title": "Vue 组件 进阶", "content": "组件 插槽 props", "tags": ["vue"]},
+        {"_id": "c", "title": "Docker 部署", "content": "镜像 容器 编排", "tags": ["ops"]},
+    ]
+    index._build(docs)
+    related = [doc_id for doc_id, _ in index.related("a")]
+    assert related[0] == "b"
+    assert "a" not in related
+    assert "c" not in related
+    assert index.related("missing") == []
+
+
+def test_incremental_updates_match_brute_force():
+    """随机新增、修改、删除、撤回发布后，邻居表与暴力计算一致"""
+    rng = random.Random(7)
+    docs = [_doc(rng) for _ in range(60)]
+    index = RelatedIndex()
+    index._build(docs)
+    _assert_neighbors_exact(index)
+
+    for _ in range(150):
+        op = rng.random()
+        if op < 0.4:
+            doc = _doc(rng)
+            docs.append(doc)
+            index._upsert(doc)
+        elif op < 0.7:
+            doc = rng.choice(docs)
+            doc["content"] = " ".join(rng.choices(WORDS, k=30))
+            doc["tags"] = rng.sample(TAGS, 2)
+            index._upsert(doc)
+        elif op < 0.85:
+            doc = docs.pop(rng.randrange(len(docs)))
+            index._remove(str(doc["_id"]))
+        else:
+            doc = docs.pop(rng.randrange(len(docs)))
+            index._upsert({**doc, "published": False})
+    assert len(index.ids) == len(docs)
+    _assert_neighbors_exact(index)
+
+
+def test_async_updates_are_serialized_with_rebuild():
+    """rebuild 与 upsert/remove 串行执行：构建完成后整体替换，之后的增量更新不会丢失"""
+    rng = random.Random(3)
+    client = AsyncMongoMockClient()
+    db = client["related-test"]
+    docs = [_doc(rng) for _ in range(20)]
+    late = _doc(rng)
+
+    async def scenario():
+        await db.blogs.insert_many(docs)
+        index = RelatedIndex()
+        await asyncio.gather(
+            index.rebuild(db),
+            index.upsert(late),
+            index.remove(str(docs[0]["_id"])),
+        )
+        return index
+
+    index = asyncio.run(scenario())
+    assert str(late["_id"]) in index.rows
+    assert str(docs[0]["_id"]) not in index.rows
+    assert len(index.ids) == len(docs)
+    _assert_neighbors_exact(index)
+
+
+if __name__ == "__main__":
+    test_tag_and_text_similarity()
+    test_incremental_updates_match_brute_force()
+    test_async_updates_are_serialized_with_rebuild()
+    print("✅ 相关文章测试通过")
@@ -0,0 +1,125 @@
+"""
+全文搜索索引的单元测试（不需要启动服务器）
+运行：python -m pytest test_search.py
+"""
+import os
+from datetime import datetime
+
+os.environ.setdefault("JWT_SECRET", "test")
+
+from app.core.search import SearchIndex, highlight, tokenize, tokenize_query
+
+
+def _index(*docs):
+    index = SearchIndex()
+    for doc in docs:
+        index.upsert({"published": True, "category": "技术", **doc})
+    return index
+
+
+def _ids(hits):
+    return [hit.id for hit in hits]
+
+
+def test_tokenize_latin_and_cjk():
+    """拉丁文按单词小写切分，中日韩文本切分为单字与双字组"""
+    assert tokenize("Hello, FastAPI_v2!") == ["hello", "fastapi", "v2"]
+    assert tokenize("数据库") == ["数", "据", "库", "数据", "据库"]
+    assert tokenize("Vue3组件") == ["vue3", "组", "件", "组件"]
+
+
+def test_tokenize_query_prefers_bigrams():
+    """查询中的中文只用双字组，单个汉字保留；重复词去重"""
+    assert tokenize_query("数据库 数据") == ["数据", "据库"]
+    assert tokenize_query("库") == ["库"]
+    assert tokenize_query("Vue vue") == ["vue"]
+
+
+def test_bm25_field_weights_and_term_frequency():
+    """标题命中高于正文命中，词频更高的文档排在前面"""
+    index = _index(
+        {"_id": "title", "title": "MongoDB 索引", "content": "其他内容"},
+        {"_id": "body", "title": "其他", "content": "讲一点 MongoDB"},
+        {"_id": "often", "title": "其他", "content": "MongoDB 与 MongoDB"},
+        {"_id": "noise", "title": "无关", "content": "无关"},
+    )
+    assert _ids(index.search("mongodb")) == ["title", "often", "body"]
+
+
+def test_all_terms_required():
+    index = _index(
+        {"_id": "both", "title": "Redis 缓存"},
+        {"_id": "one", "title": "Redis 集群"},
+    )
+    assert _ids(index.search("redis 缓存")) == ["both"]
+    assert index.search("redis kafka") == []
+
+
+def test_cjk_bigram_matching():
+    """中文查询按双字组匹配，不会因为单字重合误命中"""
+    index = _index(
+        {"_id": "db", "title": "数据库优化"},
+        {"_id": "other", "title": "数学与据点"},
+    )
+    assert _ids(index.search("数据库")) == ["db"]
+    assert _ids(index.search("据库")) == ["db"]
+
+
+def test_prefix_matching_on_last_term():
+    """最后一个词按前缀匹配，完整命中的得分更高；前面的词仍需完整命中"""
+    index = _index(
+        {"_id": "fastapi", "title": "FastAPI 入门"},
+        {"_id": "fast", "title": "Fast 服务"},
+        {"_id": "slow", "title": "Django 入门"},
+    )
+    assert _ids(index.search("fast")) == ["fast", "fastapi"]
+    assert _ids(index.search("fastap")) == ["fastapi"]
+    assert index.search("fas 入门") == []
+    assert _ids(index.search("入门 fas")) == ["fastapi"]
+    # 单个字母不展开
+    assert index.search("f") == []
+
+
+def test_prefix_vocabulary_follows_updates():
+    index = _index({"_id": "a", "title": "Kubernetes"})
+    assert _ids(index.search("kube")) == ["a"]
+    index.remove("a")
+    assert index.search("kube") == []
+    index.upsert({"_id": "b", "title": "kubectl", "published": True})
+    assert _ids(index.search("kube")) == ["b"]
+
+
+def test_filters_and_incremental_updates():
+    """草稿和其他分类被过滤；更新后旧词不再命中"""
+    index = _index(
+        {"_id": "pub", "title": "Python 入门", "date": datetime(2024, 1, 1)},
+        {"_id": "draft", "title": "Python 草稿", "published": False},
+        {"_id": "life", "title": "Python 生活", "category": "生活"},
+    )
+    assert set(_ids(index.search("python"))) == {"pub", "life"}
+    assert set(_ids(index.search("python", published_only=False))) == {"pub", "draft", "life"}
+    assert _ids(index.search("python", category="生活")) == ["life"]
+
+    index.upsert({"_id": "pub", "title": "Rust 入门", "published": True, "category": "技术"})
+    assert "pub" not in _ids(index.search("python"))
+    assert _ids(index.search("rust")) == ["pub"]
+    assert index.postings.get("python", {}).get("pub") is None
+
+
+def test_highlight_escapes_html():
+    doc = {"title": "<b>FastAPI</b> 教程", "content": "正文"}
+    assert highlight(doc, "fastapi") == {"title": "&lt;b&gt;<mark>FastAPI</mark>&lt;/b&gt; 教程"}
+    assert highlight(doc, "  ") == {}
+
+
+if __name__ == "__main__":
+    test_tokenize_latin_and_cjk()
+    test_tokenize_query_prefers_bigrams()
+    test_bm25_field_weights_and_term_frequency()
+    test_all_terms_required()
+    test_cjk_bigram_matching()
+    test_prefix_matching_on_last_term()
+    test_prefix_vocabulary_follows_updates()
+    test_filters_and_incremental_updates()
+    test_highlight_escapes_html()
+    print("✅ 全文搜索测试通过")
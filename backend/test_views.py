@@ -0,0 +1,94 @@
+"""
+热度计算的单元测试（不需要启动服务器）
+运行：python -m pytest test_views.py
+"""
+import math
+import os
+
+os.environ.setdefault("JWT_SECRET", "test")
+
+from app.core.views import HOT_EPOCH, add_hot_score, hot_log_weight, hot_score_update
+from app.core.config import settings
+
+HALF_LIFE = settings.hot_half_life_hours * 3600
+
+
+def _evaluate(expr, doc):
+    """按 MongoDB 语义求值 hot_score_update 用到的聚合运算符"""
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if not isinstance(expr, dict):
+        return expr
+    (op, args), = expr.items()
+    values = [_evaluate(arg, doc) for arg in args]
+    if op == "$cond":
+        return values[1] if values[0] else values[2]
+    if op == "$gt":
+        return values[0] is not None and values[0] > values[1]
+    if op == "$max":
+        return max(v for v in values if v is not None)
+    if op == "$min":
+        return min(v for v in values if v is not None)
+    if op == "$add":
+        return sum(values)
+    if op == "$subtract":
+        return values[0] - values[1]
+    if op == "$pow":
+        return math.pow(values[0], values[1])
+    if op == "$log":
+        return math.log(values[0], values[1])
+    raise AssertionError(f"未覆盖的运算符 {op}")
+
+
+def test_weight_near_overflow_boundary():
+    """线性权重在 1024 个半衰期后溢出，对数权重保持有限且单调"""
+    boundary = HOT_EPOCH + 1024 * HALF_LIFE
+    try:
+        math.pow(2.0, (boundary + HALF_LIFE - HOT_EPOCH) / HALF_LIFE)
+    except OverflowError:
+        pass
+    else:
+        raise AssertionError("线性权重应当在边界之后溢出")
+
+    before = hot_log_weight(boundary - 1)
+    after = hot_log_weight(boundary + HALF_LIFE)
+    much_later = hot_log_weight(boundary + 10_000 * HALF_LIFE)
+    assert all(math.isfinite(w) for w in (before, after, much_later))
+    assert before < after < much_later
+    assert math.isclose(after - hot_log_weight(boundary), 1.0)
+
+
+def test_log_space_accumulation():
+    """对数相加与线性累加等价：同一时刻的两次浏览恰好加 1"""
+    now = HOT_EPOCH + 1024 * HALF_LIFE
+    weight = hot_log_weight(now)
+    assert math.isclose(add_hot_score(weight, weight), weight + 1)
+    assert math.isclose(hot_log_weight(now, 4), weight + 2)
+
+    # 小数值下与直接计算的结果一致
+    assert math.isclose(add_hot_score(3.0, 5.0), math.log2(2 ** 3 + 2 ** 5))
+
+
+def test_decay_ordering():
+    """一个半衰期前的两次浏览与现在的一次浏览热度相同"""
+    now = HOT_EPOCH + 2000 * HALF_LIFE
+    old = add_hot_score(hot_log_weight(now - HALF_LIFE), hot_log_weight(now - HALF_LIFE))
+    assert math.isclose(old, hot_log_weight(now))
+    assert hot_log_weight(now - 2 * HALF_LIFE, 3) < hot_log_weight(now)
+
+
+def test_update_expression_matches_python():
+    """数据库表达式与 add_hot_score 结果一致，首次浏览直接取权重"""
+    weight = hot_log_weight(HOT_EPOCH + 1500 * HALF_LIFE, 7)
+    assert _evaluate(hot_score_update(weight), {}) == weight
+    for score in (weight - 40.0, weight - 0.5, weight, weight + 3.0):
+        result = _evaluate(hot_score_update(weight), {"hot_score": score})
+        assert math.isclose(result, add_hot_score(score, weight))
+
+
+if __name__ == "__main__":
+    test_weight_near_overflow_boundary()
+    test_log_space_accumulation()
+    test_decay_ordering()
+    test_update_expression_matches_python()
+    print("✅ 热度计算测试通过")